@@ -0,0 +1,23 @@
+#!/bin/bash
+# Vendor dev-test-ops-pro/port-check.py into the chart: helm package only
+# includes files inside the chart, so the initContainer's ConfigMap reads a
+# real copy from files/ rather than a symlink.
+#   ./sync-port-check.sh          copy the script into the chart
+#   ./sync-port-check.sh --check  exit 1 if the chart's copy is out of date (CI)
+
+HERE="$(cd "$(dirname "$0")" && pwd)"
+SOURCE="$HERE/../../../port-check.py"
+VENDORED="$HERE/my-helm-chart/files/port-check.py"
+
+if [ "$1" = "--check" ]; then
+    if cmp -s "$SOURCE" "$VENDORED"; then
+        echo "✅ Chart copy of port-check.py is up to date"
+        exit 0
+    fi
+    echo "❌ $VENDORED differs from port-check.py; run $0"
+    exit 1
+fi
+
+mkdir -p "$(dirname "$VENDORED")"
+cp "$SOURCE" "$VENDORED"
+echo "✅ Copied port-check.py into the chart"
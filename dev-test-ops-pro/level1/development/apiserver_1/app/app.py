@@ -1,14 +1,41 @@
+import cProfile
+import hashlib
+import hmac
+import json
+import math
+import multiprocessing
 import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FutureTimeout, wait as wait_futures
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from functools import wraps
+from functools import lru_cache, partial, wraps
+from itertools import islice
 
-from flask import Flask, request, jsonify
-from flask import Flask
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError, TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
+import click
 import jwt
 
+try:
+    import orjson  # optional: much faster encoding for user listings
+except ImportError:
+    orjson = None
+
 # -----------------------------
 # Config
 # -----------------------------
@@ -17,21 +44,508 @@ DB_PASS = os.getenv("POSTGRES_PASSWORD", "apppass")
 DB_NAME = os.getenv("POSTGRES_DB", "appdb")
 DB_HOST = os.getenv("POSTGRES_HOST", "postgres")
 DB_PORT = os.getenv("POSTGRES_PORT", "5432")
+# Connection pool (per gunicorn worker; ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARMUP = os.getenv("DB_POOL_WARMUP", "true").lower() in ("1", "true", "yes")
 JWT_SECRET = os.getenv("JWT_SECRET", "change_me_in_prod")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 0 disables the cache
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))  # seconds, capped by the token's exp
+# Password hashing runs in a per-worker process pool so it never holds the GIL
+HASH_METHOD = os.getenv("HASH_METHOD", "scrypt")  # any werkzeug method, e.g. "scrypt:16384:8:1", "pbkdf2:sha256:600000"
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))  # 0 hashes inline in the request thread
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "16"))  # max in-flight hashes before 503
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+USERS_MAX_PAGE_SIZE = int(os.getenv("USERS_MAX_PAGE_SIZE", "1000"))
+USERS_STREAM_BATCH = int(os.getenv("USERS_STREAM_BATCH", "500"))
+USERS_VERSION_TTL = float(os.getenv("USERS_VERSION_TTL", "1"))  # seconds a worker trusts its cached version
+USERS_PAGE_CACHE_SIZE = int(os.getenv("USERS_PAGE_CACHE_SIZE", "32"))  # rendered pages per worker, 0 disables
+USERS_CACHE_MAX_AGE = int(os.getenv("USERS_CACHE_MAX_AGE", "0"))  # Cache-Control max-age for clients
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "10000"))  # per /api/register/batch request
+BATCH_INSERT_SIZE = int(os.getenv("BATCH_INSERT_SIZE", "500"))  # rows per INSERT/transaction
+# Shared secret for /api/register/batch (X-Import-Token header); unset = CLI import only
+BATCH_IMPORT_TOKEN = os.getenv("BATCH_IMPORT_TOKEN", "")
+# Login throttling: token buckets per client IP and per email, checked before any
+# DB lookup or hashing. RATE (tokens/second) refills up to BURST attempts.
+LOGIN_RATE_LIMIT_ENABLED = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Per-IP bucket is off by default: behind the ingress or NAT without
+# TRUSTED_PROXIES every client shares one IP. Set LOGIN_IP_RATE > 0 to enable
+LOGIN_IP_RATE = float(os.getenv("LOGIN_IP_RATE", "0"))
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_EMAIL_RATE = float(os.getenv("LOGIN_EMAIL_RATE", "0.1"))
+LOGIN_EMAIL_BURST = float(os.getenv("LOGIN_EMAIL_BURST", "5"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" (per worker) or "redis" (shared)
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # least recently seen keys are evicted
+RATE_LIMIT_SHARDS = int(os.getenv("RATE_LIMIT_SHARDS", "16"))
+TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "0"))  # X-Forwarded-For hops to trust for the client IP
+# Schema handling: "lazy" = create_all on the first request, "startup" = at app
+# creation (old behaviour), "skip" = never (run `flask --app app init-db` instead)
+DB_INIT_MODE = os.getenv("DB_INIT_MODE", "lazy").strip().lower()
+# Metrics: each worker flushes a snapshot into METRICS_DIR, /metrics merges them
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "apiserver-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "2"))
+# Opt-in request profiling (cProfile); no hooks are installed unless enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")  # request header that asks for a profile
+PROFILE_TRIGGER_TOKEN = os.getenv("PROFILE_TRIGGER_TOKEN", "")  # if set, the header must carry this value
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # fraction of requests profiled anyway
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "apiserver-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))  # oldest .pstats files are deleted beyond this
 
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
-app = Flask(__name__)
-CORS(app)
-app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
+# -----------------------------
+# Metrics
+# -----------------------------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, label names)
+METRIC_DEFS = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status.", ("endpoint", "method", "status")),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency.", ("endpoint", "method")),
+    "http_requests_in_flight": ("gauge", "Requests currently being served.", ("endpoint",)),
+    "db_queries_total": ("counter", "SQL statements executed, by endpoint.", ("endpoint",)),
+    "db_query_duration_seconds": ("histogram", "SQL statement latency, by endpoint.", ("endpoint",)),
+    "app_stage_duration_seconds": ("histogram", "Time spent in hashing and serialization.", ("stage",)),
+    "hash_pool_rejections_total": ("counter", "Requests refused with 503 because the hash pool was full.", ()),
+    "login_throttled_total": ("counter", "Login attempts refused with 429, by bucket.", ("scope",)),
+    "token_cache_hits_total": ("counter", "Verified-token cache hits.", ()),
+    "token_cache_misses_total": ("counter", "Verified-token cache misses.", ()),
+    "db_pool_checkouts_total": ("counter", "Connection pool checkouts.", ()),
+    "db_pool_timeouts_total": ("counter", "Connection pool checkout timeouts.", ()),
+    "db_pool_invalidations_total": ("counter", "Connections invalidated by the pool.", ()),
+    "db_pool_wait_seconds_total": ("counter", "Total time spent waiting for a pooled connection.", ()),
+}
+
+class Metrics:
+    """Per-worker counters, gauges and histograms with file-based aggregation.
+
+    Each gunicorn worker keeps its numbers in memory and a background thread
+    writes a JSON snapshot to METRICS_DIR every METRICS_FLUSH_INTERVAL
+    seconds; /metrics flushes the serving worker's snapshot and merges the
+    files of every worker into Prometheus text format. Scrapes read only
+    files, never live counters, so whichever worker answers sees the same
+    sums. Gauges from workers that have exited are dropped, counters are kept.
+
+    Files are tagged with a boot id so a restarted server never sums the
+    files of an earlier run: gunicorn's on_starting hook exports a fresh
+    METRICS_BOOT_ID that its workers inherit; a single-process server
+    (python app.py, flask run) uses an id of its own.
+    """
+
+    def __init__(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._own_boot_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = defaultdict(float)
+        self._histograms = {}
+        self._flush_lock = threading.Lock()
+        self._flusher_pid = None
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self._counters[(name, labels)] += value
+
+    def gauge_add(self, name, labels=(), value=1):
+        with self._lock:
+            self._gauges[(name, labels)] += value
+
+    def observe(self, name, labels, seconds):
+        with self._lock:
+            hist = self._histograms.get((name, labels))
+            if hist is None:
+                hist = self._histograms[(name, labels)] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    hist[0][i] += 1
+                    break
+            hist[1] += seconds
+            hist[2] += 1
+
+    @contextmanager
+    def time_stage(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("app_stage_duration_seconds", (stage,), time.perf_counter() - started)
+
+    def snapshot(self):
+        cache, pool = token_cache.stats(), pool_stats.snapshot()
+        counters = {
+            ("token_cache_hits_total", ()): cache["hits"],
+            ("token_cache_misses_total", ()): cache["misses"],
+            ("db_pool_checkouts_total", ()): pool["checkouts"],
+            ("db_pool_timeouts_total", ()): pool["timeouts"],
+            ("db_pool_invalidations_total", ()): pool["invalidations"],
+            ("db_pool_wait_seconds_total", ()): pool["wait_seconds_total"],
+        }
+        with self._lock:
+            counters.update(self._counters)
+            return {
+                "pid": os.getpid(),
+                "counters": [[n, list(l), v] for (n, l), v in counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self._gauges.items()],
+                "histograms": [[n, list(l), list(h[0]), h[1], h[2]] for (n, l), h in self._histograms.items()],
+            }
+
+    @property
+    def boot_id(self):
+        # Read per call: gunicorn sets the env var after a preloaded import
+        return os.getenv("METRICS_BOOT_ID") or self._own_boot_id
+
+    def flush(self):
+        # Request threads, the timer and /metrics all flush; one writer per tmp file
+        with self._flush_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"metrics-{self.boot_id}-{os.getpid()}.json")
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+
+    def start_flusher(self):
+        """Start this process's flush timer (once per pid, so forked workers get their own)."""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._flush_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        self._remove_stale_files()
+
+    def _remove_stale_files(self):
+        """Delete earlier runs' snapshots whose process is gone (they are never read)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            parts = name[:-len(".json")].split("-") if name.endswith(".json") else []
+            if len(parts) != 3 or parts[0] != "metrics" or parts[1] == self.boot_id:
+                continue
+            if parts[2].isdigit() and _pid_alive(int(parts[2])):
+                continue  # another live server sharing METRICS_DIR
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass  # try again next tick
+
+    def _collect(self):
+        """Merge the snapshot files of every worker, this one flushed first."""
+        snapshots = {}
+        try:
+            self.flush()
+        except OSError:
+            snapshots[os.getpid()] = self.snapshot()  # unwritable dir: still report ourselves
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        prefix = f"metrics-{self.boot_id}-"
+        for name in names:
+            if not (name.startswith(prefix) and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.setdefault(snap["pid"], snap)
+
+        counters, gauges, histograms = defaultdict(float), defaultdict(float), {}
+        for pid, snap in snapshots.items():
+            for n, l, v in snap["counters"]:
+                counters[(n, tuple(l))] += v
+            if _pid_alive(pid):
+                for n, l, v in snap["gauges"]:
+                    gauges[(n, tuple(l))] += v
+            for n, l, buckets, total, count in snap["histograms"]:
+                merged = histograms.setdefault((n, tuple(l)), [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        return counters, gauges, histograms
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        counters, gauges, histograms = self._collect()
+        by_name = defaultdict(list)
+        for (n, l), v in list(counters.items()) + list(gauges.items()):
+            by_name[n].append((l, v))
+        for (n, l), h in histograms.items():
+            by_name[n].append((l, h))
+
+        lines = []
+        for name, (kind, help_text, label_names) in METRIC_DEFS.items():
+            samples = by_name.get(name)
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples, key=lambda item: item[0]):
+                pairs = list(zip(label_names, labels))
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+                    continue
+                buckets, total, count = value
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS, buckets):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_format_labels(pairs + [('le', repr(bound))])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(pairs + [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(total)}")
+                lines.append(f"{name}_count{_format_labels(pairs)} {count}")
+        return "\n".join(lines) + "\n"
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+metrics = Metrics(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+
+def _metrics_endpoint():
+    return request.endpoint if has_request_context() and request.endpoint else "none"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    endpoint = _metrics_endpoint()
+    metrics.inc("db_queries_total", (endpoint,))
+    metrics.observe("db_query_duration_seconds", (endpoint,), time.perf_counter() - started.pop())
+
+def init_metrics(app):
+    """Install the request and SQL hooks that feed /metrics."""
+    for name, listener in (("before_cursor_execute", _before_cursor_execute),
+                           ("after_cursor_execute", _after_cursor_execute)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+    @app.before_request
+    def _metrics_start():
+        metrics.start_flusher()
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = request.endpoint or "unmatched"
+        metrics.gauge_add("http_requests_in_flight", (g.metrics_endpoint,), 1)
+
+    @app.after_request
+    def _metrics_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(_exc):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        endpoint = g.metrics_endpoint
+        status = str(g.pop("metrics_status", 500))
+        metrics.gauge_add("http_requests_in_flight", (endpoint,), -1)
+        metrics.inc("http_requests_total", (endpoint, request.method, status))
+        metrics.observe("http_request_duration_seconds", (endpoint, request.method), time.perf_counter() - started)
+
+# -----------------------------
+# Profiling
+# -----------------------------
+# cProfile can only follow one request at a time per process; others just skip
+_profile_lock = threading.Lock()
+
+def _should_profile():
+    requested = request.headers.get(PROFILE_HEADER)
+    if requested:
+        if PROFILE_TRIGGER_TOKEN:
+            return requested == PROFILE_TRIGGER_TOKEN
+        return requested.lower() in ("1", "true", "yes")
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def _save_profile(profiler):
+    """Dump a .pstats file into PROFILE_DIR and trim it to PROFILE_MAX_FILES."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    endpoint = (request.endpoint or "unmatched").replace(".", "_")
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.pstats"))
+
+    files = sorted(
+        (e for e in os.scandir(PROFILE_DIR) if e.name.endswith(".pstats")),
+        key=lambda e: e.stat().st_mtime,
+    )
+    for entry in files[:max(len(files) - PROFILE_MAX_FILES, 0)]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+    return profile_id
+
+def init_profiler(app):
+    """Profile sampled or header-flagged requests; returns the id in X-Profile-Id."""
+
+    @app.before_request
+    def _profile_start():
+        if not _should_profile() or not _profile_lock.acquire(blocking=False):
+            return
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.after_request
+    def _profile_stop(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        _profile_lock.release()
+        try:
+            response.headers["X-Profile-Id"] = _save_profile(profiler)
+        except OSError as e:
+            app.logger.warning("Could not save profile: %s", e)
+        return response
+
+    @app.teardown_request
+    def _profile_abort(_exc):
+        # after_request is skipped if the response itself failed to build
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _profile_lock.release()
+
+# -----------------------------
+# DB pool instrumentation
+# -----------------------------
+class PoolStats:
+    """Counters fed by pool events, reported by /health/db-pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
 
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            pool_stats.incr("timeouts")
+            raise
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
 
-db = SQLAlchemy(app)
+event.listen(InstrumentedQueuePool, "connect", lambda *_: pool_stats.incr("connects"))
+event.listen(InstrumentedQueuePool, "checkout", lambda *_: pool_stats.incr("checkouts"))
+event.listen(InstrumentedQueuePool, "checkin", lambda *_: pool_stats.incr("checkins"))
+event.listen(InstrumentedQueuePool, "invalidate", lambda *_: pool_stats.incr("invalidations"))
+event.listen(InstrumentedQueuePool, "soft_invalidate", lambda *_: pool_stats.incr("invalidations"))
+
+def engine_options(database_url):
+    if database_url.startswith("sqlite"):
+        return {}  # let Flask-SQLAlchemy pick SQLite's own pool
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def warm_db_pool(app):
+    """Open DB_POOL_SIZE connections up front so the first requests don't pay for them.
+
+    Called from gunicorn's post_worker_init hook; failures are logged, not fatal.
+    """
+    if not DB_POOL_WARMUP:
+        return
+    with app.app_context():
+        pool = db.engine.pool
+        target = pool.size() if isinstance(pool, QueuePool) else 1
+        conns = []
+        try:
+            for _ in range(target):
+                conns.append(db.engine.connect())
+        except Exception as e:
+            app.logger.warning("DB pool warm-up stopped after %d connections: %s", len(conns), e)
+        finally:
+            for conn in conns:
+                conn.close()
+
+# Bound to an app in create_app(); nothing here opens a connection at import
+db = SQLAlchemy()
+api = Blueprint("api", __name__, cli_group=None)
 
 # -----------------------------
 # Models
@@ -54,9 +568,236 @@ class User(db.Model):
             "created_at": self.created_at.isoformat()
         }
 
-# Optional: create table if it doesn't exist (safe when starter kit already did)
-with app.app_context():
-    db.create_all()
+class TableVersion(db.Model):
+    """Change counter per table, bumped inside every write transaction."""
+    __tablename__ = "table_versions"
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+# Columns exposed by the API (everything except password_hash), in to_dict order
+USER_PUBLIC_COLUMNS = (User.id, User.username, User.email, User.role, User.created_at)
+
+def user_row_to_dict(row):
+    """Same shape as User.to_dict() for a row selected with USER_PUBLIC_COLUMNS."""
+    return {
+        "id": row[0],
+        "username": row[1],
+        "email": row[2],
+        "role": row[3],
+        "created_at": row[4].isoformat()
+    }
+
+def _user_row_native(row):
+    # created_at stays a datetime; orjson renders it exactly like isoformat()
+    return {"id": row[0], "username": row[1], "email": row[2], "role": row[3], "created_at": row[4]}
+
+def serialize_users(rows) -> bytes:
+    """Encode USER_PUBLIC_COLUMNS rows as a compact, key-sorted JSON array.
+
+    Same bytes with or without orjson. Non-ASCII text is written as raw
+    UTF-8 (orjson cannot escape it), where jsonify would write \\uXXXX.
+    """
+    with metrics.time_stage("serialize"):
+        if orjson is not None:
+            return orjson.dumps([_user_row_native(r) for r in rows], option=orjson.OPT_SORT_KEYS)
+        return json.dumps(
+            [user_row_to_dict(r) for r in rows], sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+def select_users(after_id=None):
+    """Column-only SELECT of the public user fields in id order (no ORM objects)."""
+    stmt = db.select(*USER_PUBLIC_COLUMNS).order_by(User.id.asc())
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    return stmt
+
+def bump_version_stmt(table, dialect=None):
+    """Statement that increments ``table``'s TableVersion counter (creating it at 1).
+
+    Run it in the same transaction as the write: the row lock orders
+    concurrent writers, so every commit is visible as a new version even when
+    ids commit out of order. ``dialect`` defaults to the Flask app's engine.
+    """
+    dialect = dialect or db.engine.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        module = postgresql if dialect == "postgresql" else sqlite
+        stmt = module.insert(TableVersion).values(name=table, version=1)
+        return stmt.on_conflict_do_update(
+            index_elements=[TableVersion.name], set_={"version": TableVersion.version + 1}
+        )
+    # Other dialects: the counter row must already exist
+    return (db.update(TableVersion).where(TableVersion.name == table)
+            .values(version=TableVersion.version + 1))
+
+def select_version_stmt(table):
+    return db.select(TableVersion.version).where(TableVersion.name == table)
+
+# Rendered /api/users keyset pages per worker, keyed by (version, limit, after_id)
+_users_page_cache = OrderedDict()
+_users_page_cache_lock = threading.Lock()
+
+class UsersVersion:
+    """Cheap change token for the users table, used as the /api/users ETag.
+
+    The token is the "users" TableVersion counter, which every write path
+    bumps inside its own transaction (see bump_version_stmt). Each worker
+    caches it for ``ttl`` seconds; writers call ``bump()`` after committing so
+    their own worker drops the cached token and rendered pages at once.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._value = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        return str(db.session.execute(select_version_stmt("users")).scalar() or 0)
+
+    def get(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._value is not None and now - self._loaded_at < self.ttl:
+                return self._value
+        value = self._load()
+        with self._lock:
+            self._value, self._loaded_at = value, now
+        return value
+
+    def bump(self):
+        with self._lock:
+            self._value = None
+        with _users_page_cache_lock:
+            _users_page_cache.clear()
+
+users_version = UsersVersion(USERS_VERSION_TTL)
+
+def insert_user_stmt(dialect=None):
+    """INSERT into users that skips rows whose email already exists.
+
+    Postgres and SQLite get a single ``ON CONFLICT (email) DO NOTHING
+    RETURNING ...`` statement, so an empty result means a duplicate. Other
+    dialects get a plain INSERT and callers must handle IntegrityError.
+    ``dialect`` defaults to the Flask app's engine.
+    """
+    dialect = dialect or db.engine.dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+    else:
+        stmt = insert(User)
+    return stmt.returning(*USER_PUBLIC_COLUMNS)
+
+def parse_user_fields(data):
+    """Normalise a registration payload into (column values, plain password).
+
+    Raises ValueError when a required field is missing or longer than its column.
+    """
+    username = (data.get("username") or "").strip()
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+    role = (data.get("role") or "student").strip()
+
+    if not username or not email or not password:
+        raise ValueError("username, email, and password are required")
+    for name, value in (("username", username), ("email", email), ("role", role)):
+        limit = User.__table__.c[name].type.length
+        if len(value) > limit:
+            raise ValueError(f"{name} must be at most {limit} characters")
+    return {"username": username, "email": email, "role": role if role else "student"}, password
+
+def import_users(records, batch_size=BATCH_INSERT_SIZE):
+    """Bulk-register user dicts; returns one result dict per input record.
+
+    Rows are validated and de-duplicated up front, then hashed in parallel and
+    inserted ``batch_size`` at a time, one transaction per batch. Status is one
+    of created / exists (email already in the table) / duplicate (repeated in
+    this import) / invalid / error.
+    """
+    results = [None] * len(records)
+    pending = []  # (index, values, password)
+    seen = set()
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            results[i] = {"index": i, "status": "invalid", "error": "row must be a JSON object"}
+            continue
+        try:
+            values, password = parse_user_fields(record)
+        except ValueError as e:
+            results[i] = {"index": i, "status": "invalid", "error": str(e)}
+            continue
+        if values["email"] in seen:
+            results[i] = {"index": i, "email": values["email"], "status": "duplicate"}
+            continue
+        seen.add(values["email"])
+        pending.append((i, values, password))
+
+    stmt = insert_user_stmt()
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        # A failed batch marks its own rows as errors; later batches still run
+        try:
+            hashes = hash_passwords([password for _, _, password in chunk])
+        except HashPoolBusy:
+            _mark_errors(results, chunk, "password hashing pool busy, retry these rows")
+            continue
+        rows = [dict(values, password_hash=h) for (_, values, _), h in zip(chunk, hashes)]
+        try:
+            created = {row[2]: row[0] for row in db.session.execute(stmt, rows)}
+            if created:
+                db.session.execute(bump_version_stmt("users"))
+            db.session.commit()
+            users_version.bump()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            _mark_errors(results, chunk, str(getattr(e, "orig", None) or e))
+            continue
+        for i, values, _ in chunk:
+            email = values["email"]
+            if email in created:
+                results[i] = {"index": i, "email": email, "status": "created", "id": created[email]}
+            else:
+                results[i] = {"index": i, "email": email, "status": "exists"}
+    return results
+
+def _mark_errors(results, chunk, error):
+    for i, values, _ in chunk:
+        results[i] = {"index": i, "email": values["email"], "status": "error", "error": error}
+
+def summarize_import(results):
+    summary = {"total": len(results)}
+    for r in results:
+        summary[r["status"]] = summary.get(r["status"], 0) + 1
+    return summary
+
+def read_user_records(lines):
+    """Parse NDJSON lines (blank lines skipped) into a list of records."""
+    records = []
+    for n, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            raise ValueError(f"line {n} is not valid JSON")
+    return records
+
+# Optional: create table if it doesn't exist (safe when starter kit already did).
+# Done once per process behind a lock, on first use rather than at import, so
+# gunicorn --preload forks workers from a parent that never touched the DB.
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+def ensure_schema():
+    global _schema_ready
+    if _schema_ready:
+        return
+    with _schema_lock:
+        if not _schema_ready:
+            db.create_all()
+            _schema_ready = True
 
 # -----------------------------
 # Auth helpers
@@ -71,6 +812,183 @@ def create_jwt(user_id: int, role: str, email: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
+class TokenCache:
+    """Bounded LRU of verified JWT payloads, keyed by the token's SHA-256 digest.
+
+    Entries live until the earlier of the token's ``exp`` and ``ttl`` seconds,
+    so an expired token is never served from the cache.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        if self.maxsize <= 0:
+            return None
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token, payload):
+        if self.maxsize <= 0:
+            return
+        expires = time.time() + self.ttl
+        if "exp" in payload:
+            expires = min(expires, float(payload["exp"]))
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+def decode_jwt(token: str) -> dict:
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+        token_cache.put(token, payload)
+    return payload
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing pool is saturated; mapped to 503."""
+
+_hash_pool = None
+_hash_pool_pid = None
+_hash_pool_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(max(HASH_QUEUE_SIZE, 1))
+
+def _get_hash_pool():
+    # Created lazily and per pid so gunicorn workers each get their own pool
+    global _hash_pool, _hash_pool_pid
+    with _hash_pool_lock:
+        if _hash_pool is None or _hash_pool_pid != os.getpid():
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _hash_pool_pid = os.getpid()
+        return _hash_pool
+
+def _reset_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+def submit_hash(fn, *args):
+    """Queue fn(*args) on the hash pool and return its concurrent Future.
+
+    A queue slot is held until the work finishes (even if the caller stops
+    waiting); HashPoolBusy is raised when all HASH_QUEUE_SIZE slots are taken.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        future = _get_hash_pool().submit(fn, *args)
+    except BrokenProcessPool:
+        _hash_slots.release()
+        _reset_hash_pool()
+        raise HashPoolBusy()
+    future.add_done_callback(lambda _f: _hash_slots.release())
+    return future
+
+def _run_hash(fn, *args):
+    if HASH_WORKERS <= 0:
+        return fn(*args)
+    try:
+        return submit_hash(fn, *args).result(timeout=HASH_TIMEOUT)
+    except FutureTimeout:
+        raise HashPoolBusy()
+    except BrokenProcessPool:
+        _reset_hash_pool()
+        raise HashPoolBusy()
+
+def hash_password(password: str) -> str:
+    with metrics.time_stage("hash"):
+        return _run_hash(generate_password_hash, password, HASH_METHOD)
+
+def verify_password(password_hash: str, password: str) -> bool:
+    with metrics.time_stage("hash"):
+        return _run_hash(check_password_hash, password_hash, password)
+
+def hash_passwords(passwords):
+    """Hash a list of passwords across the pool, preserving order.
+
+    The whole batch takes a single queue slot, and at most HASH_WORKERS of
+    its hashes sit in the pool's queue at a time, so a login submitted
+    during an import waits behind one round of them, not the whole batch.
+    """
+    with metrics.time_stage("hash"):
+        return _hash_passwords(passwords)
+
+def _hash_passwords(passwords):
+    hasher = partial(generate_password_hash, method=HASH_METHOD)
+    if HASH_WORKERS <= 0 or len(passwords) < 2:
+        return [hasher(p) for p in passwords]
+    if not _hash_slots.acquire(blocking=False):
+        raise HashPoolBusy()
+    try:
+        pool = _get_hash_pool()
+        hashes = [None] * len(passwords)
+        todo = enumerate(passwords)
+        in_flight = {pool.submit(hasher, p): i for i, p in islice(todo, HASH_WORKERS)}
+        while in_flight:
+            done, _ = wait_futures(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                hashes[in_flight.pop(future)] = future.result()
+                for i, p in islice(todo, 1):
+                    in_flight[pool.submit(hasher, p)] = i
+        return hashes
+    except BrokenProcessPool:
+        _reset_hash_pool()
+        raise HashPoolBusy()
+    finally:
+        _hash_slots.release()
+
+@lru_cache(maxsize=1)
+def _current_hash_params() -> str:
+    # e.g. "scrypt:32768:8:1" - everything before the salt. Costs one full hash,
+    # so create_app() warms it at startup instead of a request thread paying
+    return generate_password_hash("", HASH_METHOD).split("$", 1)[0]
+
+def needs_rehash(password_hash: str) -> bool:
+    return password_hash.split("$", 1)[0] != _current_hash_params()
+
 def token_required(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
@@ -79,7 +997,7 @@ def token_required(f):
             return jsonify({"error": "Missing or invalid Authorization header"}), 401
         token = auth.split(" ", 1)[1].strip()
         try:
-            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+            payload = decode_jwt(token)
             request.user = payload  # attach to request
         except jwt.ExpiredSignatureError:
             return jsonify({"error": "Token expired"}), 401
@@ -88,40 +1006,209 @@ def token_required(f):
         return f(*args, **kwargs)
     return wrapper
 
+# -----------------------------
+# Login throttling
+# -----------------------------
+class LocalBucketStore:
+    """In-process token buckets, sharded by key hash, each shard an LRU.
+
+    Every check is O(1) and memory is capped at ``max_keys`` buckets; the
+    least recently seen keys are evicted first (they would be full anyway
+    once idle long enough). Counts are per worker, so with N workers the
+    effective limit is up to N times the configured one.
+    """
+
+    def __init__(self, max_keys, shards):
+        self.shards = max(shards, 1)
+        self.per_shard = max(max_keys // self.shards, 1)
+        self._buckets = [OrderedDict() for _ in range(self.shards)]
+        self._locks = [threading.Lock() for _ in range(self.shards)]
+
+    def take(self, key, rate, burst):
+        """Consume one token; returns seconds to wait (0.0 when allowed)."""
+        i = hash(key) % self.shards
+        buckets = self._buckets[i]
+        now = time.monotonic()
+        with self._locks[i]:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [burst, now]
+                if len(buckets) > self.per_shard:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def reset(self, key):
+        """Forget a bucket; it starts full on its next take."""
+        i = hash(key) % self.shards
+        with self._locks[i]:
+            self._buckets[i].pop(key, None)
+
+class RedisBucketStore:
+    """Token buckets shared by every worker and pod through Redis.
+
+    Same ``take`` contract as LocalBucketStore; the refill-and-take runs as
+    one Lua script on the Redis clock. Redis errors fail open.
+    """
+
+    SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for this backend
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2)
+        self._take = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, rate, burst):
+        try:
+            return float(self._take(keys=[f"login-throttle:{key}"], args=[rate, burst]))
+        except Exception:
+            return 0.0
+
+    def reset(self, key):
+        try:
+            self._client.delete(f"login-throttle:{key}")
+        except Exception:
+            pass
+
+def _make_bucket_store():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBucketStore(RATE_LIMIT_REDIS_URL)
+    return LocalBucketStore(RATE_LIMIT_MAX_KEYS, RATE_LIMIT_SHARDS)
+
+login_buckets = _make_bucket_store() if LOGIN_RATE_LIMIT_ENABLED else None
+
+def login_throttle(ip, email):
+    """Return seconds until the next login attempt is allowed, or None if allowed now."""
+    if login_buckets is None:
+        return None
+    checks = []
+    if LOGIN_IP_RATE > 0:
+        checks.append(("ip", ip, LOGIN_IP_RATE, LOGIN_IP_BURST))
+    if email and LOGIN_EMAIL_RATE > 0:
+        checks.append(("email", email, LOGIN_EMAIL_RATE, LOGIN_EMAIL_BURST))
+    for scope, key, rate, burst in checks:
+        wait = login_buckets.take(f"{scope}:{key}", rate, burst)
+        if wait > 0:
+            metrics.inc("login_throttled_total", (scope,))
+            return wait
+    return None
+
+def login_succeeded(email):
+    """Refill the email bucket after a verified password so only failures count."""
+    if login_buckets is not None and email and LOGIN_EMAIL_RATE > 0:
+        login_buckets.reset(f"email:{email}")
+
+def too_many_attempts(wait):
+    resp = jsonify({"error": "Too many login attempts, try again later"})
+    resp.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+    return resp, 429
+
 # -----------------------------
 # Routes
 # -----------------------------
-@app.route("/health", methods=["GET"])
+@api.app_errorhandler(HashPoolBusy)
+def hash_pool_busy(_e):
+    metrics.inc("hash_pool_rejections_total")
+    resp = jsonify({"error": "Server busy, please retry"})
+    resp.headers["Retry-After"] = "1"
+    return resp, 503
+
+@api.route("/health", methods=["GET"])
 def health():
     return {"status": "ok"}
 
-@app.route("/api/register", methods=["POST"])
+@api.route("/health/db-pool", methods=["GET"])
+def db_pool_stats():
+    pool = db.engine.pool
+    state = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        state.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    return jsonify({"pid": os.getpid(), "pool": state, "events": pool_stats.snapshot()}), 200
+
+@api.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@api.route("/api/register", methods=["POST"])
 def register():
     data = request.get_json(silent=True) or {}
-    username = (data.get("username") or "").strip()
-    email = (data.get("email") or "").strip().lower()
-    password = data.get("password") or ""
-    role = (data.get("role") or "student").strip()
-
-    if not username or not email or not password:
-        return jsonify({"error": "username, email, and password are required"}), 400
+    try:
+        values, password = parse_user_fields(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    # Check existing
-    if User.query.filter_by(email=email).first():
+    # One round-trip: the unique email index decides, no SELECT-then-INSERT race
+    values["password_hash"] = hash_password(password)
+    try:
+        row = db.session.execute(insert_user_stmt(), values).first()
+        if row is not None:
+            db.session.execute(bump_version_stmt("users"))
+        db.session.commit()
+        users_version.bump()
+    except IntegrityError:
+        db.session.rollback()
+        row = None
+    if row is None:
         return jsonify({"error": "Email already registered"}), 409
 
-    user = User(
-        username=username,
-        email=email,
-        password_hash=generate_password_hash(password),
-        role=role if role else "student"
-    )
-    db.session.add(user)
-    db.session.commit()
+    return jsonify({"message": "User registered successfully", "user": user_row_to_dict(row)}), 201
+
+@api.route("/api/register/batch", methods=["POST"])
+def register_batch():
+    # Body: JSON array of register payloads, or NDJSON (application/x-ndjson).
+    # Gated on an operator secret, not a JWT role: /api/register lets callers pick their role
+    if not BATCH_IMPORT_TOKEN:
+        return jsonify({"error": "Batch import over HTTP is disabled"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Import-Token", "").encode(), BATCH_IMPORT_TOKEN.encode()):
+        return jsonify({"error": "Invalid or missing X-Import-Token"}), 403
+    try:
+        batch_size = _int_arg("batch_size") or BATCH_INSERT_SIZE
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if batch_size < 1:
+        return jsonify({"error": "batch_size must be positive"}), 400
+
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        try:
+            records = read_user_records(request.stream.read().decode("utf-8").splitlines())
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({"error": str(e)}), 400
+    else:
+        records = request.get_json(silent=True)
+        if not isinstance(records, list):
+            return jsonify({"error": "Body must be a JSON array or NDJSON"}), 400
+
+    if len(records) > BATCH_MAX_ROWS:
+        return jsonify({"error": f"At most {BATCH_MAX_ROWS} users per request"}), 413
 
-    return jsonify({"message": "User registered successfully", "user": user.to_dict()}), 201
+    results = import_users(records, batch_size)
+    return jsonify({"summary": summarize_import(results), "results": results}), 200
 
-@app.route("/api/login", methods=["POST"])
+@api.route("/api/login", methods=["POST"])
 def login():
     data = request.get_json(silent=True) or {}
     email = (data.get("email") or "").strip().lower()
@@ -130,22 +1217,224 @@ def login():
     if not email or not password:
         return jsonify({"error": "email and password are required"}), 400
 
+    # Throttle before touching the DB or the hash pool
+    wait = login_throttle(request.remote_addr, email)
+    if wait is not None:
+        return too_many_attempts(wait)
+
     user = User.query.filter_by(email=email).first()
-    if not user or not check_password_hash(user.password_hash, password):
+    if not user or not verify_password(user.password_hash, password):
         return jsonify({"error": "Invalid email or password"}), 401
+    login_succeeded(email)
+
+    # Read the claims before the upgrade below; a rollback would expire them
+    user_id, role = user.id, user.role
+    token = create_jwt(user_id, role, user.email)
+
+    # Upgrade hashes made with older HASH_METHOD settings while we know the password.
+    # Best effort: the login already succeeded, so a failure here is only logged
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = hash_password(password)
+            db.session.commit()
+        except HashPoolBusy:
+            pass
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            current_app.logger.warning("Password rehash for user %s not saved: %s", user_id, e)
 
-    token = create_jwt(user.id, user.role, user.email)
     return jsonify({
         "message": "Login successful",
         "token": token,
-        "user_role": user.role
+        "user_role": role
     }), 200
 
-@app.route("/api/users", methods=["GET"])
+@api.route("/api/users", methods=["GET"])
 @token_required
 def get_users():
-    users = User.query.order_by(User.id.asc()).all()
-    return jsonify([u.to_dict() for u in users]), 200
+    # ?limit=N&after_id=K   -> keyset page (next cursor in X-Next-After-Id)
+    # ?stream=json|ndjson   -> whole table streamed from a server-side cursor
+    # no params             -> full list (kept for existing clients)
+    try:
+        limit = _int_arg("limit")
+        after_id = _int_arg("after_id")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream = (request.args.get("stream") or "").strip().lower()
+    if stream and stream not in ("json", "ndjson", "1", "true"):
+        return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+    if limit is not None and (limit < 1 or limit > USERS_MAX_PAGE_SIZE):
+        return jsonify({"error": f"limit must be between 1 and {USERS_MAX_PAGE_SIZE}"}), 400
+
+    # Conditional GET: a matching If-None-Match never touches the users rows
+    version = users_version.get()
+    etag = f"users-v{version}"
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    elif stream:
+        resp = _stream_users(after_id, ndjson=(stream == "ndjson"))
+    else:
+        body, next_after_id = _render_users_page(version, limit, after_id)
+        resp = Response(body, status=200, mimetype="application/json")
+        if next_after_id is not None:
+            resp.headers["X-Next-After-Id"] = str(next_after_id)
+    resp.set_etag(etag, weak=True)
+    resp.cache_control.private = True
+    resp.cache_control.max_age = USERS_CACHE_MAX_AGE
+    resp.cache_control.must_revalidate = True
+    return resp
+
+def _render_users_page(version, limit, after_id):
+    """Return (json body, next cursor) for a page, reusing this worker's last renders.
+
+    Only keyset pages (bounded by USERS_MAX_PAGE_SIZE) are cached; the
+    unpaginated full list is rendered each time so its size never multiplies
+    across cached versions.
+    """
+    cacheable = limit is not None and USERS_PAGE_CACHE_SIZE > 0
+    key = (version, limit, after_id)
+    if cacheable:
+        with _users_page_cache_lock:
+            cached = _users_page_cache.get(key)
+            if cached is not None:
+                _users_page_cache.move_to_end(key)
+                return cached
+
+    stmt = select_users(after_id)
+    next_after_id = None
+    if limit is None:
+        rows = db.session.execute(stmt).all()
+    else:
+        # Fetch one extra row to know whether another page exists
+        rows = db.session.execute(stmt.limit(limit + 1)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_after_id = rows[-1][0]
+    rendered = (serialize_users(rows) + b"\n", next_after_id)
+
+    if cacheable:
+        with _users_page_cache_lock:
+            _users_page_cache[key] = rendered
+            while len(_users_page_cache) > USERS_PAGE_CACHE_SIZE:
+                _users_page_cache.popitem(last=False)
+    return rendered
+
+def _int_arg(name):
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+def _stream_users(after_id, ndjson=False):
+    """Yield users in id order without materialising the whole table."""
+    stmt = select_users(after_id).execution_options(
+        stream_results=True, yield_per=USERS_STREAM_BATCH
+    )
+
+    def generate():
+        first = True
+        if not ndjson:
+            yield b"["
+        # Rows arrive from the server-side cursor USERS_STREAM_BATCH at a time
+        for rows in db.session.execute(stmt).partitions():
+            if ndjson:
+                yield b"".join(serialize_users([r])[1:-1] + b"\n" for r in rows)
+            else:
+                chunk = serialize_users(rows)[1:-1]
+                yield chunk if first else b"," + chunk
+            first = False
+        if not ndjson:
+            yield b"]"
+
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(stream_with_context(generate()), status=200, mimetype=mimetype)
+
+# -----------------------------
+# CLI
+# -----------------------------
+@api.cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--batch-size", default=BATCH_INSERT_SIZE, show_default=True, help="Rows per INSERT/transaction.")
+@click.option("--report", type=click.Path(dir_okay=False), help="Write the per-row results as JSON here.")
+def import_users_command(path, batch_size, report):
+    """Bulk-import users from a JSON array or NDJSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        if text.lstrip().startswith("["):
+            records = json.loads(text)
+        else:
+            records = read_user_records(text.splitlines())
+    except ValueError as e:
+        raise click.ClickException(f"{path}: {e}")
+
+    started = time.perf_counter()
+    results = import_users(records, batch_size)
+    elapsed = time.perf_counter() - started
+
+    if report:
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    click.echo(f"{json.dumps(summarize_import(results))} in {elapsed:.1f}s")
+
+@api.cli.command("init-db")
+def init_db_command():
+    """Create missing tables (use with DB_INIT_MODE=skip)."""
+    db.create_all()
+    click.echo("✅ Database schema is up to date")
+
+# -----------------------------
+# App factory
+# -----------------------------
+def create_app(config=None):
+    app = Flask(__name__)
+    CORS(app, expose_headers=["X-Next-After-Id", "ETag", "X-Profile-Id"])
+    app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if config:
+        app.config.update(config)
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    )
+
+    if TRUSTED_PROXIES > 0:
+        # Behind the ingress: take the client IP from X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+    db.init_app(app)
+    app.register_blueprint(api)
+    if METRICS_ENABLED:
+        init_metrics(app)
+    if PROFILING_ENABLED:
+        init_profiler(app)
+
+    # Calibrate the rehash check now rather than with a full hash on the first login
+    _current_hash_params()
+
+    if DB_INIT_MODE == "startup":
+        with app.app_context():
+            ensure_schema()
+            # With gunicorn --preload this ran in the master: drop the pooled
+            # connection so forked workers don't share its socket
+            db.engine.dispose()
+    elif DB_INIT_MODE == "lazy":
+        @app.before_request
+        def _lazy_schema():
+            # Health endpoints stay DB-free so probes pass while Postgres boots
+            if request.endpoint not in ("api.health", "api.db_pool_stats", "api.prometheus_metrics"):
+                ensure_schema()
+
+    return app
+
+# Built at import for gunicorn/flask ("app:app"). Hash pool workers are spawned,
+# and under `python app.py` each re-imports this file as __mp_main__: skip the
+# app there so they don't re-calibrate hashing or touch the DB.
+if __name__ != "__mp_main__":
+    app = create_app()
 
 # -----------------------------
 # Entry
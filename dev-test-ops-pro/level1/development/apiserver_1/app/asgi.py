@@ -0,0 +1,301 @@
+"""ASGI entry point serving the same user API as app.py.
+
+Same routes and JSON bodies as the Flask app (/health, /api/register,
+/api/login, /api/users), but on an event loop with an async SQLAlchemy engine
+(asyncpg for Postgres, aiosqlite for local SQLite), so slow or idle clients
+cost a coroutine instead of a gunicorn thread. Password hashing still runs in
+app.py's process pool and is awaited, never executed on the loop.
+
+    pip install -r requirements-asgi.txt
+    cd app && uvicorn asgi:app --host 0.0.0.0 --port 5050 --workers 2
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import jwt
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app import (
+    DATABASE_URL, DB_INIT_MODE, HASH_METHOD, HASH_TIMEOUT, HASH_WORKERS, TRUSTED_PROXIES,
+    USERS_CACHE_MAX_AGE, USERS_MAX_PAGE_SIZE, USERS_STREAM_BATCH,
+    HashPoolBusy, User, create_jwt, db, decode_jwt, engine_options,
+    bump_version_stmt, insert_user_stmt, login_succeeded, login_throttle, needs_rehash,
+    parse_user_fields, select_users, select_version_stmt, serialize_users, submit_hash,
+    user_row_to_dict, _reset_hash_pool,
+)
+
+# -----------------------------
+# Config
+# -----------------------------
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url):
+    """Swap the sync driver in DATABASE_URL for its async counterpart."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    return f"{ASYNC_DRIVERS.get(backend, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+
+# Same DB_POOL_* settings as the sync app; asyncio needs its own pool class
+_options = {k: v for k, v in engine_options(ASYNC_DATABASE_URL).items() if k != "poolclass"}
+engine = create_async_engine(ASYNC_DATABASE_URL, **_options)
+DIALECT = engine.dialect.name
+
+_schema_ready = False
+_schema_lock = asyncio.Lock()
+
+
+async def ensure_schema():
+    global _schema_ready
+    if _schema_ready or DB_INIT_MODE == "skip":
+        return
+    async with _schema_lock:
+        if not _schema_ready:
+            async with engine.begin() as conn:
+                await conn.run_sync(db.metadata.create_all)
+            _schema_ready = True
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def json_response(data, status=200, headers=None):
+    # Same bytes as Flask's jsonify: sorted keys, compact separators, newline
+    body = json.dumps(data, sort_keys=True, separators=(",", ":")) + "\n"
+    return Response(body, status_code=status, media_type="application/json", headers=headers)
+
+
+async def run_hash(fn, *args):
+    """Await fn(*args) on the hash pool without blocking the event loop."""
+    if HASH_WORKERS <= 0:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(submit_hash(fn, *args)), HASH_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HashPoolBusy()
+    except BrokenProcessPool:
+        _reset_hash_pool()
+        raise HashPoolBusy()
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def authenticate(request):
+    """Return (payload, None) or (None, error response) like token_required."""
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        return None, json_response({"error": "Missing or invalid Authorization header"}, 401)
+    token = auth.split(" ", 1)[1].strip()
+    try:
+        return decode_jwt(token), None
+    except jwt.ExpiredSignatureError:
+        return None, json_response({"error": "Token expired"}, 401)
+    except jwt.InvalidTokenError:
+        return None, json_response({"error": "Invalid token"}, 401)
+
+
+def client_ip(request):
+    if TRUSTED_PROXIES > 0:
+        hops = [h.strip() for h in request.headers.get("X-Forwarded-For", "").split(",") if h.strip()]
+        if len(hops) >= TRUSTED_PROXIES:
+            return hops[-TRUSTED_PROXIES]
+    return request.client.host if request.client else ""
+
+
+def int_param(request, name):
+    raw = request.query_params.get(name)
+    if raw is None or raw == "":
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+# -----------------------------
+# Routes
+# -----------------------------
+async def health(request):
+    return json_response({"status": "ok"})
+
+
+async def register(request):
+    data = await read_json(request)
+    try:
+        values, password = parse_user_fields(data)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    await ensure_schema()
+    values["password_hash"] = await run_hash(generate_password_hash, password, HASH_METHOD)
+    try:
+        async with engine.begin() as conn:
+            row = (await conn.execute(insert_user_stmt(DIALECT), values)).first()
+            if row is not None:
+                await conn.execute(bump_version_stmt("users", DIALECT))
+    except IntegrityError:
+        row = None
+    if row is None:
+        return json_response({"error": "Email already registered"}, 409)
+
+    return json_response({"message": "User registered successfully", "user": user_row_to_dict(row)}, 201)
+
+
+async def login(request):
+    data = await read_json(request)
+    email = (data.get("email") or "").strip().lower()
+    password = data.get("password") or ""
+
+    if not email or not password:
+        return json_response({"error": "email and password are required"}, 400)
+
+    # Throttle before touching the DB or the hash pool (off the loop: the
+    # Redis backend does blocking network I/O)
+    wait = await asyncio.to_thread(login_throttle, client_ip(request), email)
+    if wait is not None:
+        return json_response({"error": "Too many login attempts, try again later"}, 429,
+                             headers={"Retry-After": str(max(1, math.ceil(wait)))})
+
+    await ensure_schema()
+    async with engine.connect() as conn:
+        user = (await conn.execute(
+            select(User.id, User.role, User.email, User.password_hash).where(User.email == email)
+        )).first()
+    if not user or not await run_hash(check_password_hash, user.password_hash, password):
+        return json_response({"error": "Invalid email or password"}, 401)
+    await asyncio.to_thread(login_succeeded, email)
+
+    # Upgrade hashes made with older HASH_METHOD settings while we know the password
+    if needs_rehash(user.password_hash):
+        try:
+            new_hash = await run_hash(generate_password_hash, password, HASH_METHOD)
+            async with engine.begin() as conn:
+                await conn.execute(
+                    User.__table__.update().where(User.id == user.id).values(password_hash=new_hash)
+                )
+        except HashPoolBusy:
+            pass
+        except SQLAlchemyError as e:
+            # The login already succeeded; the upgrade is retried next time
+            logger.warning("Password rehash for user %s not saved: %s", user.id, e)
+
+    token = create_jwt(user.id, user.role, user.email)
+    return json_response({
+        "message": "Login successful",
+        "token": token,
+        "user_role": user.role
+    }, 200)
+
+
+async def get_users(request):
+    _payload, error = authenticate(request)
+    if error is not None:
+        return error
+    try:
+        limit = int_param(request, "limit")
+        after_id = int_param(request, "after_id")
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    stream = (request.query_params.get("stream") or "").strip().lower()
+    if stream and stream not in ("json", "ndjson", "1", "true"):
+        return json_response({"error": "stream must be 'json' or 'ndjson'"}, 400)
+    if limit is not None and (limit < 1 or limit > USERS_MAX_PAGE_SIZE):
+        return json_response({"error": f"limit must be between 1 and {USERS_MAX_PAGE_SIZE}"}, 400)
+
+    await ensure_schema()
+    async with engine.connect() as conn:
+        version = (await conn.execute(select_version_stmt("users"))).scalar() or 0
+    etag = f'W/"users-v{version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={USERS_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if etag in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if stream:
+        ndjson = stream == "ndjson"
+        return StreamingResponse(
+            _stream_users(after_id, ndjson),
+            media_type="application/x-ndjson" if ndjson else "application/json",
+            headers=headers,
+        )
+
+    stmt = select_users(after_id)
+    if limit is not None:
+        # Fetch one extra row to know whether another page exists
+        stmt = stmt.limit(limit + 1)
+    async with engine.connect() as conn:
+        rows = (await conn.execute(stmt)).all()
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-After-Id"] = str(rows[-1][0])
+    return Response(serialize_users(rows) + b"\n", media_type="application/json", headers=headers)
+
+
+async def _stream_users(after_id, ndjson):
+    first = True
+    if not ndjson:
+        yield b"["
+    async with engine.connect() as conn:
+        result = await conn.stream(select_users(after_id))
+        async for rows in result.partitions(USERS_STREAM_BATCH):
+            if ndjson:
+                yield b"".join(serialize_users([r])[1:-1] + b"\n" for r in rows)
+            else:
+                chunk = serialize_users(rows)[1:-1]
+                yield chunk if first else b"," + chunk
+            first = False
+    if not ndjson:
+        yield b"]"
+
+
+async def hash_pool_busy(request, exc):
+    return json_response({"error": "Server busy, please retry"}, 503, headers={"Retry-After": "1"})
+
+
+# -----------------------------
+# App
+# -----------------------------
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/api/register", register, methods=["POST"]),
+        Route("/api/login", login, methods=["POST"]),
+        Route("/api/users", get_users, methods=["GET"]),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+            expose_headers=["X-Next-After-Id", "ETag"],
+        ),
+    ],
+    exception_handlers={HashPoolBusy: hash_pool_busy},
+)
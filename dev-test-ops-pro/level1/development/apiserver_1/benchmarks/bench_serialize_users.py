@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: ORM + to_dict + jsonify vs column rows + serialize_users.
+
+Seeds a throwaway SQLite database and times both ways of rendering the
+GET /api/users body. Run from apiserver_1/:
+
+    python benchmarks/bench_serialize_users.py --users 50000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, os.path.join(HERE, "..", "app"))
+    import app as api  # noqa: E402  (needs DATABASE_URL set first)
+    from flask import jsonify
+
+    with api.app.app_context():
+        api.db.create_all()
+        now = datetime.utcnow()
+        api.db.session.execute(api.User.__table__.insert(), [
+            {"username": f"user{i}", "email": f"user{i}@bench.local",
+             "password_hash": "x", "role": "student", "created_at": now}
+            for i in range(args.users)
+        ])
+        api.db.session.commit()
+
+        def orm_path():
+            users = api.User.query.order_by(api.User.id.asc()).all()
+            body = jsonify([u.to_dict() for u in users]).get_data()
+            api.db.session.expunge_all()
+            return body
+
+        def column_path():
+            rows = api.db.session.execute(api.select_users()).all()
+            return api.serialize_users(rows) + b"\n"
+
+        # Byte-equal for this ASCII-only data; jsonify would \u-escape non-ASCII
+        assert orm_path() == column_path(), "output differs between paths"
+
+        print(f"🔬 {args.users} users, best of {args.repeat}, "
+              f"encoder: {'orjson' if api.orjson else 'stdlib json'}")
+        timings = {}
+        for name, fn in (("orm + to_dict + jsonify", orm_path),
+                         ("columns + serialize_users", column_path)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - started)
+            timings[name] = best
+            print(f"  {name:<28} {best * 1000:8.1f} ms  {args.users / best:12,.0f} rows/s")
+
+        old, new = timings.values()
+        print(f"⚡ speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Load-test the API server against a throwaway SQLite database.
+
+Boots app.py in a subprocess (Flask's threaded server or gunicorn with
+gunicorn.conf.py), seeds N users, then drives concurrent workloads and
+reports req/s and p50/p95/p99 latency as JSON. Compare against a stored
+baseline to catch regressions. Run from apiserver_1/:
+
+    python benchmarks/load_test.py --users 2000 --concurrency 16 --output results.json
+    python benchmarks/load_test.py --baseline baseline.json --threshold 0.15
+    python benchmarks/load_test.py --save-baseline baseline.json
+
+Workloads:
+    login     POST /api/login for random seeded users (hashing-bound)
+    register  POST /api/register with fresh emails (hashing + insert)
+    list      GET /api/users?limit=PAGE&after_id=... with a bearer token
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(HERE, "..", "app")
+PASSWORD = "bench-pass-123"
+WORKLOADS = ("login", "register", "list")
+
+
+# -----------------------------
+# Server
+# -----------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(env, users):
+    """Create the schema and insert `users` rows sharing one password hash."""
+    os.environ.update(env)
+    sys.path.insert(0, APP_DIR)
+    import app as api  # noqa: E402  (reads DATABASE_URL at import)
+    from werkzeug.security import generate_password_hash
+
+    password_hash = generate_password_hash(PASSWORD, api.HASH_METHOD)
+    now = datetime.utcnow()
+    with api.app.app_context():
+        api.db.create_all()
+        api.db.session.execute(api.User.__table__.insert(), [
+            {"username": f"bench{i}", "email": f"bench{i}@bench.local",
+             "password_hash": password_hash, "role": "student", "created_at": now}
+            for i in range(users)
+        ])
+        api.db.session.commit()
+
+
+def start_server(server, env, port):
+    if server == "gunicorn":
+        cmd = ["gunicorn", "-c", os.path.join(HERE, "..", "gunicorn.conf.py"), "app:app"]
+        env = dict(env, GUNICORN_BIND=f"127.0.0.1:{port}")
+    else:
+        cmd = [sys.executable, "-m", "flask", "--app", "app", "run",
+               "--host", "127.0.0.1", "--port", str(port), "--with-threads"]
+    proc = subprocess.Popen(cmd, cwd=APP_DIR, env=dict(os.environ, **env),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited:\n{proc.stderr.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(f"{base}/health", timeout=1):
+                return proc, base
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not become healthy within 30s")
+
+
+# -----------------------------
+# Client
+# -----------------------------
+def request(method, url, body=None, headers=None):
+    """Return (status, parsed JSON or None, seconds)."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    if data is not None:
+        req.add_header("Content-Type", "application/json")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            status, payload = resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        status, payload = e.code, e.read()
+    except OSError:
+        return 0, None, time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    try:
+        return status, json.loads(payload), elapsed
+    except ValueError:
+        return status, None, elapsed
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_workload(name, base, args, token):
+    counter = iter(range(args.requests))
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    run_id = f"{int(time.time())}{random.randint(0, 9999)}"
+
+    def one_call(i):
+        if name == "login":
+            n = random.randrange(args.users)
+            return request("POST", f"{base}/api/login",
+                           {"email": f"bench{n}@bench.local", "password": PASSWORD})
+        if name == "register":
+            return request("POST", f"{base}/api/register",
+                           {"username": f"new{i}", "email": f"new{run_id}-{i}@bench.local", "password": PASSWORD})
+        after_id = random.randrange(max(args.users - args.page_size, 1))
+        return request("GET", f"{base}/api/users?limit={args.page_size}&after_id={after_id}",
+                       headers={"Authorization": f"Bearer {token}"})
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            status, _payload, elapsed = one_call(i)
+            with lock:
+                latencies.append(elapsed)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(worker)
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    ok = sum(n for s, n in statuses.items() if s.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "statuses": statuses,
+        "seconds": round(wall, 3),
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+def compare(results, baseline, threshold):
+    """Return a list of regression messages (throughput drop or latency rise > threshold)."""
+    regressions = []
+    for name, current in results["workloads"].items():
+        before = baseline.get("workloads", {}).get(name)
+        if not before:
+            continue
+        if before["rps"] and current["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: rps {before['rps']} -> {current['rps']}")
+        for key in ("p95_ms", "p99_ms"):
+            if before[key] and current[key] > before[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {before[key]} -> {current[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API server load test against SQLite")
+    parser.add_argument("--users", type=int, default=1000, help="users to seed")
+    parser.add_argument("--requests", type=int, default=500, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=100, help="limit for the list workload")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="comma-separated subset of %s" % ",".join(WORKLOADS))
+    parser.add_argument("--server", choices=("flask", "gunicorn"), default="flask")
+    parser.add_argument("--hash-method", default=None, help="override HASH_METHOD for the server")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="also write the results here")
+    args = parser.parse_args()
+
+    workloads = [w.strip() for w in args.workloads.split(",") if w.strip()]
+    unknown = set(workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp(prefix="apibench-")
+    env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "JWT_SECRET": "benchmark-secret-not-for-production-use",
+        "METRICS_DIR": os.path.join(tmp, "metrics"),
+    }
+    if args.hash_method:
+        env["HASH_METHOD"] = args.hash_method
+
+    print(f"🌱 Seeding {args.users} users into {env['DATABASE_URL']}")
+    seed_database(env, args.users)
+    proc, base = start_server(args.server, env, free_port())
+    print(f"🚀 {args.server} server up at {base}")
+
+    try:
+        status, payload, _ = request("POST", f"{base}/api/login",
+                                     {"email": "bench0@bench.local", "password": PASSWORD})
+        if status != 200:
+            raise RuntimeError(f"login for seeded user failed with {status}: {payload}")
+        token = payload["token"]
+
+        results = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "server": args.server,
+                "users": args.users,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "workloads": {},
+        }
+        for name in workloads:
+            print(f"⏱️  {name}: {args.requests} requests x {args.concurrency} workers")
+            stats = run_workload(name, base, args, token)
+            results["workloads"][name] = stats
+            print(f"   {stats['rps']:>8} req/s  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                  f"p99 {stats['p99_ms']} ms  errors {stats['errors']}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"❌ Regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
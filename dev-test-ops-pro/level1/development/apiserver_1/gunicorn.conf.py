@@ -0,0 +1,31 @@
+# Gunicorn settings for the API server (loaded via `gunicorn -c gunicorn.conf.py`)
+import glob
+import os
+import tempfile
+import uuid
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5050")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+preload_app = True
+
+# Must match METRICS_DIR in app.py
+metrics_dir = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "apiserver-metrics"))
+
+
+def on_starting(server):
+    # Workers write /metrics snapshots here; start each run from zero
+    for path in glob.glob(os.path.join(metrics_dir, "metrics-*.json")):
+        os.remove(path)
+    # Workers inherit this and only merge snapshots tagged with it
+    os.environ["METRICS_BOOT_ID"] = uuid.uuid4().hex[:12]
+
+
+def post_worker_init(worker):
+    # Each worker has its own pool; open DB_POOL_SIZE connections before serving
+    from app import app, db, warm_db_pool
+    with app.app_context():
+        # Forget any connection inherited from the master without closing the
+        # master's socket (DB_INIT_MODE=startup touches the DB before forking)
+        db.engine.dispose(close=False)
+    warm_db_pool(app)
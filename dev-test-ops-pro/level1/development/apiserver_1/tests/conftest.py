@@ -0,0 +1,64 @@
+"""Shared fixtures: app.py imported against a throwaway SQLite database.
+
+app.py reads its settings at import time, so the environment is set here,
+before any test module imports it. Hashing runs inline with a cheap method
+so the suite needs no process pool.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="apiserver-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'test.db')}",
+    "JWT_SECRET": "test-secret-long-enough-for-hs256-keys",
+    "METRICS_DIR": os.path.join(_tmp, "metrics"),
+    "HASH_METHOD": "pbkdf2:sha256:1000",
+    "HASH_WORKERS": "0",
+    "DB_POOL_WARMUP": "false",
+    "USERS_VERSION_TTL": "0",
+})
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import app as api  # noqa: E402  (needs the environment above)
+
+
+@pytest.fixture
+def app_ctx():
+    """Fresh tables and empty per-worker caches for each test."""
+    with api.app.app_context():
+        api.db.drop_all()
+        api.db.create_all()
+        api.token_cache.clear()
+        api.users_version.bump()
+        if api.login_buckets is not None:
+            api.login_buckets = api.LocalBucketStore(api.RATE_LIMIT_MAX_KEYS, api.RATE_LIMIT_SHARDS)
+        yield api
+        api.db.session.remove()
+
+
+@pytest.fixture
+def client(app_ctx):
+    return api.app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app_ctx):
+    return {"Authorization": f"Bearer {api.create_jwt(1, 'student', 'reader@test.local')}"}
+
+
+@pytest.fixture
+def add_user(app_ctx):
+    """Insert a user with an explicit id, bumping the users version like the write paths do."""
+    def add(user_id):
+        api.db.session.execute(api.User.__table__.insert(), [{
+            "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@test.local",
+            "password_hash": "x", "role": "student", "created_at": datetime.utcnow(),
+        }])
+        api.db.session.execute(api.bump_version_stmt("users"))
+        api.db.session.commit()
+        api.users_version.bump()
+    return add
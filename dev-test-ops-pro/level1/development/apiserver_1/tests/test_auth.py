@@ -0,0 +1,46 @@
+import time
+
+import jwt
+
+from conftest import api
+
+
+def token_expiring_in(seconds):
+    payload = {"sub": "1", "role": "student", "email": "reader@test.local", "exp": int(time.time()) + seconds}
+    return jwt.encode(payload, api.JWT_SECRET, algorithm="HS256")
+
+
+def test_cached_token_still_expires(client):
+    token = token_expiring_in(1)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/api/users", headers=headers).status_code == 200
+    assert api.token_cache.get(token) is not None  # verified once, now cached
+
+    time.sleep(2.1)
+    resp = client.get("/api/users", headers=headers)
+    assert resp.status_code == 401
+    assert resp.get_json() == {"error": "Token expired"}
+
+
+def test_token_cache_caps_ttl_at_exp():
+    cache = api.TokenCache(maxsize=2, ttl=300)
+    cache.put("a", {"exp": time.time() - 1})
+    assert cache.get("a") is None
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = api.TokenCache(maxsize=2, ttl=300)
+    cache.put("a", {"sub": "a"})
+    cache.put("b", {"sub": "b"})
+    cache.get("a")
+    cache.put("c", {"sub": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"sub": "a"}
+    assert cache.get("c") == {"sub": "c"}
+
+
+def test_invalid_token_is_rejected(client):
+    resp = client.get("/api/users", headers={"Authorization": "Bearer not-a-jwt"})
+    assert resp.status_code == 401
+    assert resp.get_json() == {"error": "Invalid token"}
@@ -0,0 +1,53 @@
+import pytest
+
+from conftest import api
+
+
+def statuses(results):
+    return [r["status"] for r in results]
+
+
+def test_import_reports_each_row(app_ctx):
+    api.import_users([{"username": "old", "email": "old@test.local", "password": "pw"}])
+    results = api.import_users([
+        {"username": "a", "email": "A@test.local", "password": "pw"},
+        {"username": "a2", "email": "a@test.local", "password": "pw"},  # same email after lowercasing
+        {"username": "old", "email": "old@test.local", "password": "pw"},
+        {"username": "", "email": "x@test.local", "password": "pw"},
+        "not an object",
+        {"username": "b", "email": "b@test.local", "password": "pw", "role": "teacher"},
+    ], batch_size=2)
+
+    assert statuses(results) == ["created", "duplicate", "exists", "invalid", "invalid", "created"]
+    assert [r["index"] for r in results] == list(range(6))
+    assert api.summarize_import(results) == {"total": 6, "created": 2, "duplicate": 1, "exists": 1, "invalid": 2}
+    assert api.User.query.filter_by(email="b@test.local").one().role == "teacher"
+
+
+def test_over_long_fields_are_invalid(app_ctx):
+    results = api.import_users([
+        {"username": "u" * 121, "email": "long@test.local", "password": "pw"},
+        {"username": "ok", "email": "e" * 250 + "@test.local", "password": "pw"},
+    ])
+    assert statuses(results) == ["invalid", "invalid"]
+    assert "at most 120" in results[0]["error"]
+
+
+def test_failed_batch_does_not_stop_later_batches(app_ctx, monkeypatch):
+    real, calls = api.hash_passwords, []
+
+    def busy_on_second_batch(passwords):
+        calls.append(passwords)
+        if len(calls) == 2:
+            raise api.HashPoolBusy()
+        return real(passwords)
+
+    monkeypatch.setattr(api, "hash_passwords", busy_on_second_batch)
+    rows = [{"username": f"u{i}", "email": f"u{i}@test.local", "password": "pw"} for i in range(3)]
+    assert statuses(api.import_users(rows, batch_size=1)) == ["created", "error", "created"]
+
+
+def test_ndjson_reader_reports_bad_line():
+    assert api.read_user_records(['{"a": 1}', "", '{"b": 2}']) == [{"a": 1}, {"b": 2}]
+    with pytest.raises(ValueError, match="line 2 is not valid JSON"):
+        api.read_user_records(['{"a": 1}', "{bad"])
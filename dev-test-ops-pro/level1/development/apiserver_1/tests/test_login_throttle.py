@@ -0,0 +1,54 @@
+from conftest import api
+
+
+def test_bucket_allows_burst_then_refills(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api.time, "monotonic", lambda: now[0])
+    store = api.LocalBucketStore(max_keys=100, shards=4)
+
+    assert [store.take("k", rate=1, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take("k", rate=1, burst=3) == 1.0
+
+    now[0] += 0.5
+    assert store.take("k", rate=1, burst=3) == 0.5
+    now[0] += 1.0
+    assert store.take("k", rate=1, burst=3) == 0.0
+
+
+def test_bucket_never_refills_past_burst(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(api.time, "monotonic", lambda: now[0])
+    store = api.LocalBucketStore(max_keys=100, shards=1)
+    store.take("k", rate=1, burst=2)
+    now[0] += 60
+    assert [store.take("k", rate=1, burst=2) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+def test_least_recently_seen_keys_are_evicted():
+    store = api.LocalBucketStore(max_keys=2, shards=1)
+    store.take("a", rate=0.001, burst=1)
+    store.take("b", rate=0.001, burst=1)
+    store.take("a", rate=0.001, burst=1)  # touch a, so b is the oldest
+    store.take("c", rate=0.001, burst=1)
+
+    assert list(store._buckets[0]) == ["a", "c"]
+    assert store.take("b", rate=0.001, burst=1) == 0.0  # forgotten, starts full again
+
+
+def test_reset_refills_bucket():
+    store = api.LocalBucketStore(max_keys=10, shards=1)
+    store.take("k", rate=0.001, burst=1)
+    assert store.take("k", rate=0.001, burst=1) > 0
+    store.reset("k")
+    assert store.take("k", rate=0.001, burst=1) == 0.0
+
+
+def test_only_failed_logins_use_up_the_email_bucket(client):
+    client.post("/api/register", json={"username": "u", "email": "u@test.local", "password": "pw"})
+    good = {"email": "u@test.local", "password": "pw"}
+    bad = {"email": "u@test.local", "password": "wrong"}
+
+    assert {client.post("/api/login", json=good).status_code for _ in range(10)} == {200}
+    codes = [client.post("/api/login", json=bad).status_code for _ in range(int(api.LOGIN_EMAIL_BURST) + 1)]
+    assert codes[:-1] == [401] * int(api.LOGIN_EMAIL_BURST)
+    assert codes[-1] == 429
@@ -0,0 +1,55 @@
+from conftest import api
+
+
+def test_etag_matches_give_304(client, auth_headers, add_user):
+    add_user(1)
+    first = client.get("/api/users", headers=auth_headers)
+    assert first.status_code == 200
+
+    again = client.get("/api/users", headers={**auth_headers, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_out_of_order_commit_changes_version(client, auth_headers, add_user):
+    # A lower id committing after a higher one must still invalidate
+    add_user(10)
+    before = client.get("/api/users", headers=auth_headers)
+    page_before = client.get("/api/users?limit=5", headers=auth_headers)
+    add_user(5)
+
+    after = client.get("/api/users", headers=auth_headers)
+    page_after = client.get("/api/users?limit=5", headers=auth_headers)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert [u["id"] for u in after.get_json()] == [5, 10]
+    assert [u["id"] for u in page_before.get_json()] == [10]
+    assert [u["id"] for u in page_after.get_json()] == [5, 10]
+
+    stale = client.get("/api/users", headers={**auth_headers, "If-None-Match": before.headers["ETag"]})
+    assert stale.status_code == 200
+
+
+def test_register_bumps_version(client, auth_headers):
+    before = client.get("/api/users", headers=auth_headers).headers["ETag"]
+    resp = client.post("/api/register", json={"username": "n", "email": "n@test.local", "password": "pw"})
+    assert resp.status_code == 201
+    assert client.get("/api/users", headers=auth_headers).headers["ETag"] != before
+
+
+def test_users_version_counts_writes(app_ctx, add_user):
+    assert api.users_version.get() == "0"
+    add_user(1)
+    add_user(2)
+    assert api.users_version.get() == "2"
+
+
+def test_page_cache_holds_keyset_pages_only(client, auth_headers, add_user):
+    for i in range(1, 4):
+        add_user(i)
+    client.get("/api/users", headers=auth_headers)
+    page = client.get("/api/users?limit=2", headers=auth_headers)
+    assert page.headers["X-Next-After-Id"] == "2"
+    assert list(api._users_page_cache) == [(api.users_version.get(), 2, None)]
+
+    add_user(4)
+    assert not api._users_page_cache  # bump() drops this worker's rendered pages
@@ -1,61 +1,222 @@
+import argparse
 import json
+import queue
+import threading
 import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import NoAlertPresentException, TimeoutException
+
+from page_waits import DEFAULT_POLL, wait_text, wait_visible
+
+HOME_HEADING = '//*[@id="root"]/div/h2'
+
 
 # -------------------------
 # Load Config
 # -------------------------
-with open("test_config.json", "r") as f:
-    config = json.load(f)
+def load_config(path="test_config.json"):
+    with open(path, "r") as f:
+        return json.load(f)
+
 
 # -------------------------
 # Setup WebDriver
 # -------------------------
-service = Service()  # assumes chromedriver in PATH
-driver = webdriver.Chrome(service=service)
-driver.maximize_window()
+def new_driver(headless=False):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    service = Service()  # assumes chromedriver in PATH
+    driver = webdriver.Chrome(service=service, options=options)
+    if not headless:
+        driver.maximize_window()
+    return driver
+
+
+# -------------------------
+# Login Flow
+# -------------------------
+def login(driver, config, email, password, verbose=True):
+    """Log in through the form.
+
+    Returns the seconds from clicking Login to the Home page being visible,
+    or None if the login failed.
+    """
+    log = print if verbose else (lambda *args: None)
+    poll = config.get("wait_poll_interval", DEFAULT_POLL)
 
-try:
     # Step 1: Open URL
     driver.get(config["url"])
-    print("Opened URL:", config["url"])
+    log("Opened URL:", config["url"])
 
     # Step 2: Enter Email
-    email_field = WebDriverWait(driver, 10).until(
-        EC.visibility_of_element_located((By.XPATH, config["email_locator"]))
-    )
+    email_field = wait_visible(driver, config["email_locator"], timeout=10, poll=poll)
     email_field.clear()
-    email_field.send_keys(config["email"])
-    print("Entered email")
+    email_field.send_keys(email)
+    log("Entered email")
 
     # Step 3: Enter Password
     password_field = driver.find_element(By.XPATH, config["password_locator"])
     password_field.clear()
-    password_field.send_keys(config["password"])
-    print("Entered password")
+    password_field.send_keys(password)
+    log("Entered password")
 
     # Step 4: Click Login Button
     login_button = driver.find_element(By.XPATH, config["submit_button_locator"])
+    clicked = time.perf_counter()
     login_button.click()
-    print("Clicked login button")
+    log("Clicked login button")
 
     # Step 5: Verify Login Success → Check text in h2
     try:
-        home_element = WebDriverWait(driver, 15).until(
-            EC.text_to_be_present_in_element((By.XPATH, '//*[@id="root"]/div/h2'), "Home")
-        )
+        home_element = wait_text(driver, HOME_HEADING, "Home", timeout=15, poll=poll)
         if home_element:
-            print("✅ Login Successful → Home Page is visible")
-        else:
-            print("❌ Login Failed → Home text mismatch")
+            log("✅ Login Successful → Home Page is visible")
+            return time.perf_counter() - clicked
+        log("❌ Login Failed → Home text mismatch")
     except TimeoutException:
-        print("❌ Login Failed → Home element not found within timeout")
+        log("❌ Login Failed → Home element not found within timeout")
+    return None
+
+
+def logout(driver):
+    """Drop the session the React client keeps in localStorage."""
+    try:
+        driver.switch_to.alert.dismiss()  # "Login failed" alert from the client
+    except NoAlertPresentException:
+        pass
+    driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+    driver.delete_all_cookies()
+
+
+# -------------------------
+# Load Mode
+# -------------------------
+def load_accounts(config, count):
+    """Accounts from config["load_accounts"], or `count` generated ones registered via the API."""
+    if config.get("load_accounts"):
+        return config["load_accounts"]
+    prefix = config.get("load_account_prefix", "loadtest")
+    password = config.get("load_account_password", "load-test-pass-123")
+    accounts = [{"email": f"{prefix}{i}@loadtest.local", "password": password} for i in range(count)]
+    for i, account in enumerate(accounts):
+        body = json.dumps({"username": f"{prefix}{i}", **account}).encode()
+        req = urllib.request.Request(f"{config['api_url']}/api/register", data=body, method="POST",
+                                     headers={"Content-Type": "application/json"})
+        try:
+            urllib.request.urlopen(req, timeout=30).close()
+        except urllib.error.HTTPError as e:
+            if e.code != 409:  # 409: already registered by an earlier run
+                raise RuntimeError(f"registering {account['email']} failed with {e.code}")
+    print(f"👥 {len(accounts)} generated accounts ready")
+    return accounts
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_load(config, browsers, logins, accounts):
+    """Log in `logins` times across `browsers` concurrent headless browsers."""
+    work = queue.Queue()
+    for i in range(logins):
+        work.put(accounts[i % len(accounts)])
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def worker(driver):
+        while True:
+            try:
+                account = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                elapsed = login(driver, config, account["email"], account["password"], verbose=False)
+            except Exception as e:
+                elapsed, error = None, f"{type(e).__name__}: {e}"
+            else:
+                error = None if elapsed is not None else "home page not reached"
+            with lock:
+                if error:
+                    errors.append(error)
+                else:
+                    latencies.append(elapsed)
+            try:
+                logout(driver)
+            except Exception:
+                pass
+
+    print(f"🚀 Starting {browsers} headless browsers")
+    with ThreadPoolExecutor(max_workers=browsers) as pool:
+        drivers = list(pool.map(lambda _: new_driver(headless=True), range(browsers)))
+    try:
+        print(f"⏱️  {logins} logins x {browsers} browsers")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=browsers) as pool:
+            for driver in drivers:
+                pool.submit(worker, driver)
+        wall = time.perf_counter() - started
+    finally:
+        for driver in drivers:
+            driver.quit()
+
+    latencies.sort()
+    total = len(latencies) + len(errors)
+    return {
+        "browsers": browsers,
+        "logins": total,
+        "errors": len(errors),
+        "error_rate": round(len(errors) / total, 4) if total else 0.0,
+        "seconds": round(wall, 3),
+        "logins_per_second": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "sample_errors": sorted(set(errors))[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log in through the React UI once, or under load")
+    parser.add_argument("--config", default="test_config.json")
+    parser.add_argument("--load", action="store_true", help="run concurrent logins instead of a single one")
+    parser.add_argument("--browsers", type=int, default=4, help="concurrent headless browsers (load mode)")
+    parser.add_argument("--logins", type=int, default=None, help="total logins (default: one per account)")
+    parser.add_argument("--accounts", type=int, default=20, help="accounts to generate if the config has none")
+    parser.add_argument("--output", help="write load results as JSON here")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not args.load:
+        driver = new_driver()
+        try:
+            login(driver, config, config["email"], config["password"])
+        finally:
+            driver.quit()
+        return
+
+    accounts = load_accounts(config, args.accounts)
+    results = run_load(config, max(1, args.browsers), args.logins or len(accounts), accounts)
+    print(f"📊 {results['logins_per_second']} logins/s  error rate {results['error_rate']:.1%}  "
+          f"login→home p50 {results['p50_ms']} ms  p95 {results['p95_ms']} ms  p99 {results['p99_ms']} ms")
+    for error in results["sample_errors"]:
+        print(f"   ❌ {error}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results written to {args.output}")
+
 
-finally:
-    time.sleep(3)
-    driver.quit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Start UI tests already logged in by getting the token from the API.
+
+The React client keeps its JWT in localStorage["token"] and sends it as a
+Bearer header, so a test that only needs to be authenticated can call
+POST /api/login directly and put the token in storage before the app boots,
+skipping the login form. Tokens are cached per user until shortly before
+their ``exp``, so a worker logs each user in once per token lifetime.
+"""
+import base64
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+EXPIRY_MARGIN = 30  # seconds; refresh tokens this long before they expire
+DEFAULT_TTL = 300   # used when a token carries no readable exp
+
+
+def jwt_expiry(token):
+    """Return the token's exp claim (unverified; the server does the checking) or None."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def fetch_token(api_url, email, password, timeout=10):
+    body = json.dumps({"email": email, "password": password}).encode()
+    req = urllib.request.Request(f"{api_url.rstrip('/')}/api/login", data=body, method="POST",
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read())["token"]
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"API login for {email} failed with {e.code}: {e.read().decode(errors='replace')}")
+
+
+class TokenCache:
+    """Tokens keyed by (api_url, email), valid until their exp minus a margin."""
+
+    def __init__(self, margin=EXPIRY_MARGIN):
+        self.margin = margin
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get(self, api_url, email, password):
+        key = (api_url, email)
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and cached[1] > time.time():
+                return cached[0]
+            token = fetch_token(api_url, email, password)
+            expires = jwt_expiry(token) or time.time() + DEFAULT_TTL
+            self._tokens[key] = (token, expires - self.margin)
+            return token
+
+    def forget(self, api_url, email):
+        with self._lock:
+            self._tokens.pop((api_url, email), None)
+
+
+token_cache = TokenCache()
+
+
+def seed_session(driver, app_url, token, path="/home"):
+    """Open app_url + path with localStorage["token"] already set.
+
+    On Chrome the token is written by a script that runs before the page's own
+    scripts, so this is a single navigation. Other browsers load the origin
+    first to get access to its storage.
+    """
+    target = app_url.rstrip("/") + path
+    setter = f"window.localStorage.setItem('token', {json.dumps(token)});"
+    if hasattr(driver, "execute_cdp_cmd"):
+        script = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": setter})
+        try:
+            driver.get(target)
+        finally:
+            # Pooled browsers are reused, so don't leave the script behind
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument",
+                                   {"identifier": script["identifier"]})
+    else:
+        driver.get(app_url)
+        driver.execute_script(setter)
+        driver.get(target)
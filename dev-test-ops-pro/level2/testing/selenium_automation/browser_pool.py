@@ -0,0 +1,108 @@
+"""Pool of warm Chrome sessions shared by the tests of one pytest worker.
+
+Launching Chrome is the slowest part of a UI test, so browsers are started
+once per worker and handed out by the driver_setup fixture. Between tests a
+browser is reset (extra windows, cookies, local/session storage, navigation)
+instead of relaunched. Run with pytest-xdist to shard tests across processes;
+each worker gets its own pool:
+
+    pytest ui_automation.py -n auto --alluredir=./allure-results
+"""
+import os
+import queue
+import threading
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+
+def chrome_options(headless=True, window_size="1920,1080"):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument(f"--window-size={window_size}")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    return options
+
+
+def new_driver(headless=True, window_size="1920,1080"):
+    service = Service()  # assumes chromedriver in PATH
+    driver = webdriver.Chrome(service=service, options=chrome_options(headless, window_size))
+    if not headless:
+        driver.maximize_window()
+    return driver
+
+
+class BrowserPool:
+    """Up to `size` Chrome sessions, started lazily and reused between tests."""
+
+    def __init__(self, size=1, headless=True, window_size="1920,1080"):
+        self.size = max(1, size)
+        self.headless = headless
+        self.window_size = window_size
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                driver = new_driver(self.headless, self.window_size)
+                self._all.append(driver)
+                return driver
+        return self._idle.get(timeout=timeout)
+
+    def release(self, driver):
+        """Reset the browser and return it to the pool; replace it if it is broken."""
+        try:
+            self.reset(driver)
+        except Exception as e:
+            print(f"⚠️  Browser reset failed, replacing it: {e}")
+            self.discard(driver)
+            return
+        self._idle.put(driver)
+
+    def discard(self, driver):
+        with self._lock:
+            if driver in self._all:
+                self._all.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def reset(driver):
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        # Storage is per origin, so clear it before navigating away from the app
+        driver.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+        )
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def close(self):
+        with self._lock:
+            drivers, self._all = self._all, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+def pool_from_config(config):
+    """Build a pool from test_config.json keys, overridable via BROWSER_POOL_SIZE / HEADLESS."""
+    size = int(os.getenv("BROWSER_POOL_SIZE", config.get("browser_pool_size", 1)))
+    headless = os.getenv("HEADLESS", str(config.get("headless", True))).lower() in ("1", "true", "yes")
+    return BrowserPool(size, headless, config.get("window_size", "1920,1080"))
@@ -0,0 +1,10 @@
+import pytest
+
+
+# Expose each phase's report on the item (item.rep_setup / rep_call / rep_teardown)
+# so fixtures can see in their teardown whether the test failed
+@pytest.hookimpl(tryfirst=True, hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    rep = outcome.get_result()
+    setattr(item, f"rep_{rep.when}", rep)
@@ -0,0 +1,110 @@
+"""Event-driven waits for the UI automation.
+
+WebDriverWait re-checks its condition over the wire every 0.5 s, so every
+wait costs up to half a second after the page is already ready. These waits
+run inside the page instead: a MutationObserver re-checks the XPath on every
+DOM change and resolves the async script the moment the condition holds,
+with a short interval poll as a fallback for changes the observer cannot see
+(e.g. CSS-driven visibility). If the script cannot run (the page navigated
+away mid-wait, or the driver has no async script support) the wait falls
+back to WebDriverWait with the same poll interval. A malformed XPath raises
+InvalidSelectorException straight away instead of waiting out the timeout.
+
+level2's UI tests keep a vendored copy (each level is its own project); after
+editing this file run level2/testing/selenium_automation/sync-page-waits.sh.
+"""
+import time
+
+from selenium.common.exceptions import (
+    InvalidSelectorException, JavascriptException, TimeoutException, WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+DEFAULT_POLL = 0.05  # seconds between fallback checks
+
+WAIT_JS = """
+const [kind, xpath, text, timeoutMs, pollMs, done] = arguments;
+function check() {
+    let el;
+    try {
+        el = document.evaluate(xpath, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } catch (e) {
+        return {error: `${e.name}: ${e.message}`};  // bad XPath: report, don't time out
+    }
+    if (!el) return null;
+    if (kind === 'visible') {
+        const rect = el.getBoundingClientRect();
+        const style = window.getComputedStyle(el);
+        return rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden'
+            && style.display !== 'none' ? el : null;
+    }
+    if (kind === 'text') return (el.textContent || '').includes(text) ? el : null;
+    return el;
+}
+const found = check();
+if (found) { done(found); return; }
+let finished = false, observer, poll, timer;
+const finish = (value) => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearInterval(poll);
+    clearTimeout(timer);
+    done(value);
+};
+const recheck = () => { const el = check(); if (el) finish(el); };
+observer = new MutationObserver(recheck);
+observer.observe(document.documentElement,
+    {childList: true, subtree: true, attributes: true, characterData: true});
+poll = setInterval(recheck, pollMs);
+timer = setTimeout(() => finish(null), timeoutMs);
+"""
+
+FALLBACK_CONDITIONS = {
+    "present": lambda xpath, text: EC.presence_of_element_located((By.XPATH, xpath)),
+    "visible": lambda xpath, text: EC.visibility_of_element_located((By.XPATH, xpath)),
+    "text": lambda xpath, text: EC.text_to_be_present_in_element((By.XPATH, xpath), text),
+}
+
+
+def wait_for(driver, xpath, condition="visible", text=None, timeout=10, poll=DEFAULT_POLL):
+    """Return the element once `condition` holds for `xpath`, else raise TimeoutException.
+
+    condition is "present", "visible" or "text" (element text contains `text`).
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutException(f"{condition} wait for {xpath} timed out after {timeout}s")
+        try:
+            driver.set_script_timeout(remaining + 1)
+            element = driver.execute_async_script(
+                WAIT_JS, condition, xpath, text or "", int(remaining * 1000), int(poll * 1000)
+            )
+        except JavascriptException:
+            # The document was replaced mid-wait (full navigation): observe the new one
+            time.sleep(poll)
+            continue
+        except WebDriverException:
+            break
+        if element is None:
+            raise TimeoutException(f"{condition} wait for {xpath} timed out after {timeout}s")
+        if isinstance(element, dict):
+            raise InvalidSelectorException(f"Invalid XPath {xpath}: {element.get('error')}")
+        return element
+
+    remaining = max(deadline - time.monotonic(), poll)
+    WebDriverWait(driver, remaining, poll_frequency=poll).until(FALLBACK_CONDITIONS[condition](xpath, text))
+    return driver.find_element(By.XPATH, xpath)
+
+
+def wait_visible(driver, xpath, timeout=10, poll=DEFAULT_POLL):
+    return wait_for(driver, xpath, "visible", timeout=timeout, poll=poll)
+
+
+def wait_text(driver, xpath, text, timeout=10, poll=DEFAULT_POLL):
+    return wait_for(driver, xpath, "text", text=text, timeout=timeout, poll=poll)
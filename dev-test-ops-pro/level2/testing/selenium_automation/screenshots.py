@@ -0,0 +1,129 @@
+"""Screenshot capture policy for the UI tests.
+
+Grabbing the PNG from the browser is the only part that has to happen on the
+test thread. De-duplication, downscaling and re-encoding run on a background
+thread while the test carries on, and the finished images are attached to the
+Allure result in one go when the test's `screenshots` fixture is torn down.
+
+Policies (test_config.json "screenshot_policy" or SCREENSHOT_POLICY):
+    never        no screenshots at all
+    on-failure   only failure captures (default)
+    every-step   every step capture plus failures
+    sampled      each step capture with probability screenshot_sample_rate, plus failures
+
+Converting to JPEG/WebP or downscaling needs Pillow; without it screenshots
+are attached as the original PNG.
+"""
+import hashlib
+import io
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import allure
+
+try:
+    from PIL import Image
+except ImportError:  # optional: only needed for resize / JPEG / WebP
+    Image = None
+
+POLICIES = ("never", "on-failure", "every-step", "sampled")
+FORMATS = {
+    "png": ("PNG", allure.attachment_type.PNG, None),
+    "jpeg": ("JPEG", allure.attachment_type.JPG, None),
+    "webp": ("WEBP", "image/webp", "webp"),
+}
+
+
+def encode(png, image_format="png", max_width=None, quality=80):
+    """Return (bytes, attachment_type, extension) for a raw PNG screenshot."""
+    if Image is None or (image_format == "png" and not max_width):
+        return png, allure.attachment_type.PNG, None
+    pil_format, attachment_type, extension = FORMATS[image_format]
+    img = Image.open(io.BytesIO(png))
+    if max_width and img.width > max_width:
+        img = img.resize((max_width, round(img.height * max_width / img.width)), Image.LANCZOS)
+    if pil_format == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    if pil_format == "PNG":
+        img.save(out, format=pil_format, optimize=True)
+    else:
+        img.save(out, format=pil_format, quality=quality)
+    return out.getvalue(), attachment_type, extension
+
+
+class ScreenshotRecorder:
+    """Captures screenshots per policy and attaches them when the test is reported."""
+
+    def __init__(self, policy="on-failure", sample_rate=0.25, image_format="png",
+                 max_width=None, quality=80):
+        if policy not in POLICIES:
+            raise ValueError(f"screenshot policy must be one of {', '.join(POLICIES)}")
+        if image_format not in FORMATS:
+            raise ValueError(f"screenshot format must be one of {', '.join(FORMATS)}")
+        if Image is None and (image_format != "png" or max_width):
+            print("⚠️  Pillow not installed, screenshots stay full-size PNG")
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.image_format = image_format
+        self.max_width = max_width
+        self.quality = quality
+        self._encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshots")
+        self._pending = []
+        self._seen = set()
+
+    def begin(self):
+        """Start a new test: forget frames from the previous one."""
+        self._pending = []
+        self._seen = set()
+
+    def wants(self, failure=False):
+        if self.policy == "never":
+            return False
+        if failure or self.policy == "every-step":
+            return True
+        return self.policy == "sampled" and random.random() < self.sample_rate
+
+    def capture(self, driver, name, failure=False):
+        """Take a screenshot if the policy asks for one; encoding happens in the background."""
+        if driver is None or not self.wants(failure):
+            return
+        png = driver.get_screenshot_as_png()
+        self._pending.append((name, self._encoder.submit(self._process, png)))
+
+    def _process(self, png):
+        digest = hashlib.sha1(png).hexdigest()
+        if digest in self._seen:
+            return None
+        self._seen.add(digest)
+        return encode(png, self.image_format, self.max_width, self.quality)
+
+    def flush(self):
+        """Attach every finished screenshot of the current test, in capture order."""
+        pending, self._pending = self._pending, []
+        for name, future in pending:
+            try:
+                encoded = future.result()
+            except Exception as e:
+                print(f"Failed to encode screenshot {name!r}: {e}")
+                continue
+            if encoded is None:
+                continue  # identical to an earlier frame of this test
+            body, attachment_type, extension = encoded
+            allure.attach(body, name=name, attachment_type=attachment_type, extension=extension)
+
+    def close(self):
+        self._encoder.shutdown(wait=True)
+
+
+def recorder_from_config(config):
+    """Build a recorder from test_config.json keys, overridable via SCREENSHOT_* env vars."""
+    max_width = os.getenv("SCREENSHOT_MAX_WIDTH", config.get("screenshot_max_width"))
+    return ScreenshotRecorder(
+        policy=os.getenv("SCREENSHOT_POLICY", config.get("screenshot_policy", "on-failure")),
+        sample_rate=float(os.getenv("SCREENSHOT_SAMPLE_RATE", config.get("screenshot_sample_rate", 0.25))),
+        image_format=os.getenv("SCREENSHOT_FORMAT", config.get("screenshot_format", "png")).lower(),
+        max_width=int(max_width) if max_width else None,
+        quality=int(os.getenv("SCREENSHOT_QUALITY", config.get("screenshot_quality", 80))),
+    )
@@ -0,0 +1,22 @@
+#!/bin/bash
+# Vendor level1's page_waits.py into this suite: each level's selenium
+# directory is its own project (own requirements.txt and venv), so the
+# helper is copied rather than imported across levels.
+#   ./sync-page-waits.sh          copy level1's page_waits.py here
+#   ./sync-page-waits.sh --check  exit 1 if this copy is out of date (CI)
+
+HERE="$(cd "$(dirname "$0")" && pwd)"
+SOURCE="$HERE/../../../level1/testing/selenium_automation/page_waits.py"
+VENDORED="$HERE/page_waits.py"
+
+if [ "$1" = "--check" ]; then
+    if cmp -s "$SOURCE" "$VENDORED"; then
+        echo "✅ level2 copy of page_waits.py is up to date"
+        exit 0
+    fi
+    echo "❌ $VENDORED differs from level1's page_waits.py; run $0"
+    exit 1
+fi
+
+cp "$SOURCE" "$VENDORED"
+echo "✅ Copied page_waits.py from level1"
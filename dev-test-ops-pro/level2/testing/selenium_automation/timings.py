@@ -0,0 +1,153 @@
+"""Step timings, browser timing metrics and a rolling performance baseline.
+
+Each timed step is an allure.step that also records its wall time. When the
+test finishes, the step timings are merged with the browser's Navigation
+Timing and Paint Timing entries, attached to Allure as JSON, and compared
+against the median of the last N completed runs in a JSON-lines history file.
+Gated metrics that are slower than the baseline by more than the threshold
+either fail the test or raise a warning ("timing_regression": "fail"/"warn").
+"""
+import json
+import os
+import statistics
+import time
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+
+import allure
+import pytest
+
+BROWSER_TIMINGS_JS = """
+const nav = performance.getEntriesByType('navigation')[0];
+const out = {};
+if (nav) {
+    out.ttfb_ms = nav.responseStart - nav.requestStart;
+    out.dom_content_loaded_ms = nav.domContentLoadedEventEnd - nav.startTime;
+    out.load_ms = nav.loadEventEnd - nav.startTime;
+}
+for (const p of performance.getEntriesByType('paint')) {
+    out[p.name.replace(/-/g, '_') + '_ms'] = p.startTime;
+}
+return out;
+"""
+
+
+def browser_timings(driver):
+    """Navigation and paint timings of the current document, in ms."""
+    try:
+        metrics = driver.execute_script(BROWSER_TIMINGS_JS) or {}
+    except Exception as e:
+        print(f"Failed to read browser timings: {e}")
+        return {}
+    return {k: round(v, 1) for k, v in metrics.items() if isinstance(v, (int, float)) and v >= 0}
+
+
+class TimingHistory:
+    """Append-only JSON-lines history of completed runs, one line per test run."""
+
+    def __init__(self, path, window=20, min_runs=5):
+        self.path = path
+        self.window = window
+        self.min_runs = min_runs
+
+    def runs(self, test_id):
+        if not os.path.exists(self.path):
+            return []
+        runs = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("test") == test_id:
+                    runs.append(entry["metrics"])
+        return runs[-self.window:]
+
+    def baseline(self, test_id):
+        """Median of each metric over the window, or {} until min_runs exist."""
+        runs = self.runs(test_id)
+        if len(runs) < self.min_runs:
+            return {}
+        names = {name for run in runs for name in run}
+        return {name: statistics.median(run[name] for run in runs if name in run) for name in names}
+
+    def append(self, test_id, metrics):
+        line = json.dumps({"test": test_id, "timestamp": datetime.utcnow().isoformat(), "metrics": metrics})
+        # One small O_APPEND write per line, so parallel workers don't interleave
+        with open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class StepTimings:
+    """Times allure steps of one test and gates regressions when it finishes."""
+
+    def __init__(self, test_id, history, gated=(), threshold=0.25, mode="warn"):
+        self.test_id = test_id
+        self.history = history
+        self.gated = gated
+        self.threshold = threshold
+        self.mode = mode
+        self.metrics = {}
+        self._marks = {}
+
+    @contextmanager
+    def step(self, key, title):
+        """allure.step(title) that records its duration as `<key>_ms`."""
+        with allure.step(title):
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.metrics[f"{key}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def mark(self, name):
+        self._marks[name] = time.perf_counter()
+
+    def since(self, key, mark):
+        """Record the time since mark(mark) as `<key>_ms`."""
+        self.metrics[f"{key}_ms"] = round((time.perf_counter() - self._marks[mark]) * 1000, 1)
+
+    def finish(self, driver=None):
+        """Collect browser metrics, attach, compare with baseline, then record this run."""
+        if driver is not None:
+            self.metrics.update({f"browser_{k}": v for k, v in browser_timings(driver).items()})
+        baseline = self.history.baseline(self.test_id)
+        regressions = []
+        for name in self.gated:
+            current, before = self.metrics.get(name), baseline.get(name)
+            if current is not None and before and current > before * (1 + self.threshold):
+                regressions.append(f"{name}: {current} ms vs baseline {before} ms "
+                                   f"(+{current / before - 1:.0%}, allowed {self.threshold:.0%})")
+
+        allure.attach(
+            json.dumps({"metrics": self.metrics, "baseline": baseline, "regressions": regressions}, indent=2),
+            name="Timings",
+            attachment_type=allure.attachment_type.JSON
+        )
+        self.history.append(self.test_id, self.metrics)
+
+        if regressions:
+            message = "Performance regression → " + "; ".join(regressions)
+            print(f"⚠️  {message}")
+            if self.mode == "fail":
+                pytest.fail(message)
+            warnings.warn(message)
+        return regressions
+
+
+def timings_from_config(config, test_id):
+    """Build StepTimings from test_config.json keys, overridable via TIMING_* env vars."""
+    history = TimingHistory(
+        os.getenv("TIMING_HISTORY", config.get("timing_history", "timing-history.jsonl")),
+        window=int(config.get("timing_baseline_window", 20)),
+        min_runs=int(config.get("timing_min_runs", 5)),
+    )
+    return StepTimings(
+        test_id,
+        history,
+        gated=config.get("timing_gated_metrics", ["login_to_home_ms"]),
+        threshold=float(os.getenv("TIMING_THRESHOLD", config.get("timing_threshold", 0.25))),
+        mode=os.getenv("TIMING_REGRESSION", config.get("timing_regression", "warn")),
+    )
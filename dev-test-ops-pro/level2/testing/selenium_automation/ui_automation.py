@@ -1,22 +1,14 @@
 import json
 import pytest
 import allure
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-
-@pytest.fixture(scope="function")
-def driver_setup():
-    """Setup and teardown WebDriver"""
-    service = Service()  # assumes chromedriver in PATH
-    driver = webdriver.Chrome(service=service)
-    driver.maximize_window()
-    yield driver
-    driver.quit()
+from api_session import seed_session, token_cache
+from browser_pool import pool_from_config
+from page_waits import DEFAULT_POLL, wait_text, wait_visible
+from screenshots import recorder_from_config
+from timings import timings_from_config
 
 
 @pytest.fixture(scope="session")
@@ -26,6 +18,60 @@ def config():
         return json.load(f)
 
 
+@pytest.fixture(scope="session")
+def browser_pool(config):
+    """Warm browsers shared by every test in this worker process"""
+    pool = pool_from_config(config)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="function")
+def driver_setup(browser_pool):
+    """Borrow a clean WebDriver from the pool and reset it afterwards"""
+    driver = browser_pool.acquire(timeout=60)
+    yield driver
+    browser_pool.release(driver)
+
+
+@pytest.fixture(scope="session")
+def screenshot_recorder(config):
+    """Background screenshot encoder shared by the worker's tests"""
+    recorder = recorder_from_config(config)
+    yield recorder
+    recorder.close()
+
+
+@pytest.fixture(scope="function")
+def screenshots(request, screenshot_recorder, driver_setup):
+    """Screenshot capture for one test, attached to Allure at teardown"""
+    screenshot_recorder.begin()
+    yield screenshot_recorder
+    # rep_call is set by the makereport hook in conftest.py
+    rep_call = getattr(request.node, "rep_call", None)
+    if rep_call is not None and rep_call.failed:
+        try:
+            # Identical to the test's own failure frame? De-duplicated on flush
+            screenshot_recorder.capture(driver_setup, "Failure Screenshot", failure=True)
+        except Exception as e:
+            print(f"Failed to capture screenshot: {e}")
+    screenshot_recorder.flush()
+
+
+@pytest.fixture(scope="function")
+def authenticated_driver(driver_setup, config):
+    """WebDriver already logged in via the API token, opened on the home page"""
+    token = token_cache.get(config["api_url"], config["email"], config["password"])
+    seed_session(driver_setup, config["url"], token)
+    return driver_setup
+
+
+@pytest.fixture(scope="function")
+def step_timings(request, config):
+    """Per-step timers with baseline comparison for the current test"""
+    return timings_from_config(config, request.node.nodeid)
+
+
 @allure.feature('Authentication')
 @allure.story('User Login')
 @allure.title("Test successful user login with valid credentials")
@@ -33,25 +79,21 @@ def config():
 @allure.severity(allure.severity_level.CRITICAL)
 class TestLogin:
     
-    def test_login_success(self, driver_setup, config):
+    def test_login_success(self, driver_setup, config, screenshots, step_timings):
         """Test complete login flow"""
         driver = driver_setup
+        timings = step_timings
         
         # Step 1: Open URL
-        with allure.step(f"Navigate to login page: {config['url']}"):
+        with timings.step("page_load", f"Navigate to login page: {config['url']}"):
             driver.get(config["url"])
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Login Page",
-                attachment_type=allure.attachment_type.PNG
-            )
+            screenshots.capture(driver, "Login Page")
             print("Opened URL:", config["url"])
         
         # Step 2: Enter Email
-        with allure.step(f"Enter email: {config['email']}"):
-            email_field = WebDriverWait(driver, 10).until(
-                EC.visibility_of_element_located((By.XPATH, config["email_locator"]))
-            )
+        with timings.step("enter_email", f"Enter email: {config['email']}"):
+            email_field = wait_visible(driver, config["email_locator"], timeout=10,
+                                       poll=config.get("wait_poll_interval", DEFAULT_POLL))
             email_field.clear()
             email_field.send_keys(config["email"])
             allure.attach(
@@ -62,55 +104,37 @@ class TestLogin:
             print("Entered email")
         
         # Step 3: Enter Password
-        with allure.step("Enter password"):
+        with timings.step("enter_password", "Enter password"):
             password_field = driver.find_element(By.XPATH, config["password_locator"])
             password_field.clear()
             password_field.send_keys(config["password"])
-            allure.attach(
-                driver.get_screenshot_as_png(),
-                name="Credentials Filled",
-                attachment_type=allure.attachment_type.PNG
-            )
+            screenshots.capture(driver, "Credentials Filled")
             print("Entered password")
         
         # Step 4: Click Login Button
-        with allure.step("Click login button"):
+        with timings.step("click_login", "Click login button"):
             login_button = driver.find_element(By.XPATH, config["submit_button_locator"])
+            timings.mark("login_clicked")
             login_button.click()
             print("Clicked login button")
         
         # Step 5: Verify Login Success
-        with allure.step("Verify successful login and home page display"):
+        with timings.step("verify_home", "Verify successful login and home page display"):
             try:
-                home_element = WebDriverWait(driver, 15).until(
-                    EC.text_to_be_present_in_element(
-                        (By.XPATH, '//*[@id="root"]/div/h2'), 
-                        "Home"
-                    )
-                )
+                home_element = wait_text(driver, '//*[@id="root"]/div/h2', "Home", timeout=15,
+                                         poll=config.get("wait_poll_interval", DEFAULT_POLL))
+                timings.since("login_to_home", "login_clicked")
                 if home_element:
-                    allure.attach(
-                        driver.get_screenshot_as_png(),
-                        name="Home Page Loaded Successfully",
-                        attachment_type=allure.attachment_type.PNG
-                    )
+                    screenshots.capture(driver, "Home Page Loaded Successfully")
                     print("✅ Login Successful → Home Page is visible")
                     assert True, "Login successful"
                 else:
-                    allure.attach(
-                        driver.get_screenshot_as_png(),
-                        name="Login Failed - Text Mismatch",
-                        attachment_type=allure.attachment_type.PNG
-                    )
+                    screenshots.capture(driver, "Login Failed - Text Mismatch", failure=True)
                     print("❌ Login Failed → Home text mismatch")
                     pytest.fail("Home text mismatch")
                     
             except TimeoutException as e:
-                allure.attach(
-                    driver.get_screenshot_as_png(),
-                    name="Login Failed - Timeout",
-                    attachment_type=allure.attachment_type.PNG
-                )
+                screenshots.capture(driver, "Login Failed - Timeout", failure=True)
                 allure.attach(
                     str(e),
                     name="Error Details",
@@ -119,28 +143,33 @@ class TestLogin:
                 print("❌ Login Failed → Home element not found within timeout")
                 pytest.fail(f"Home element not found within timeout: {str(e)}")
 
+        # Step 6: Record timings and compare against the rolling baseline
+        with allure.step("Check login timings against baseline"):
+            timings.finish(driver)
 
-# Optional: Add a hook to capture screenshots on test failure
-@pytest.hookimpl(tryfirst=True, hookwrapper=True)
-def pytest_runtest_makereport(item, call):
-    """Attach screenshot to Allure report on test failure"""
-    outcome = yield
-    rep = outcome.get_result()
-    
-    if rep.when == "call" and rep.failed:
-        try:
-            # Get the driver from the test fixtures
-            driver = item.funcargs.get('driver_setup')
-            if driver:
-                allure.attach(
-                    driver.get_screenshot_as_png(),
-                    name="Failure Screenshot",
-                    attachment_type=allure.attachment_type.PNG
-                )
-        except Exception as e:
-            print(f"Failed to capture screenshot: {e}")
+
+@allure.feature('Authentication')
+@allure.story('Authenticated Session')
+@allure.title("Test home page for a user with an API-issued token")
+@allure.severity(allure.severity_level.NORMAL)
+class TestHome:
+
+    def test_home_page_authenticated(self, authenticated_driver, config, screenshots):
+        """Home page renders without going through the login form"""
+        driver = authenticated_driver
+
+        with allure.step("Verify home page display"):
+            try:
+                wait_text(driver, '//*[@id="root"]/div/h2', "Home", timeout=15,
+                          poll=config.get("wait_poll_interval", DEFAULT_POLL))
+                screenshots.capture(driver, "Home Page")
+                print("✅ Authenticated session → Home Page is visible")
+            except TimeoutException as e:
+                screenshots.capture(driver, "Home Page Missing - Timeout", failure=True)
+                pytest.fail(f"Home element not found within timeout: {str(e)}")
 
 
 if __name__ == "__main__":
     # Run with pytest when executed directly
-    pytest.main([__file__, "-v", "--alluredir=./allure-results"])
\ No newline at end of file
+    # Shard across one worker per CPU (pytest-xdist); each worker keeps its own browser pool
+    pytest.main([__file__, "-v", "-n", "auto", "--alluredir=./allure-results"])
\ No newline at end of file
@@ -1,57 +1,481 @@
 #!/usr/bin/env python3
-import socket
+"""Check the stack's ports: free before start-up, or ready once it is up.
+
+With no arguments this checks that the default local ports (PostgreSQL 5454,
+Flask API 5050, React 3030) are free, as start-system.sh expects. Targets can
+also come from --target, a JSON/YAML --config file, a docker-compose file's
+published ports or a Helm values file's services; all of them are probed
+concurrently, each under its own timeout.
+
+Probes:
+    tcp       the port accepts connections (host:port or tcp://host:port)
+    postgres  the server answers a startup message and is not starting up
+              (postgres://user@host:port/db, like pg_isready)
+    http      GET returns the expected status and body text
+              (http://host:port/path; "status"/"body" in a config file)
+
+    python3 port-check.py
+    python3 port-check.py --compose level1/devops/docker-compose.yml
+    python3 port-check.py --wait --target postgres://appuser@localhost:5454/appdb --target http://localhost:5050/health
+    python3 port-check.py --helm-values devops/level4/helm/my-helm-chart/values.yaml --wait --json
+
+--wait re-runs the probes of targets that are not ready with exponential
+backoff until all of them pass or the deadline passes. --json prints one
+JSON document with per-target latency instead of the human-readable report.
+Exit status is 1 if any check fails.
+
+The Helm chart ships a copy in devops/level4/helm/my-helm-chart/files/; run
+devops/level4/helm/sync-port-check.sh after editing this file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import struct
 import sys
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
 
-def check_port(port, service_name):
-    """Check if a port is available"""
+try:
+    import yaml
+except ImportError:  # only needed for --compose / --helm-values / YAML --config
+    yaml = None
+
+DEFAULT_TARGETS = [
+    ("PostgreSQL Database", "localhost", 5454),
+    ("Flask API Server", "localhost", 5050),
+    ("React Development Server", "localhost", 3030),
+]
+
+
+@dataclass
+class Target:
+    name: str
+    host: str
+    port: int
+    probe: str = "tcp"
+    timeout: float = None  # seconds; falls back to --probe-timeout
+    options: dict = field(default_factory=dict)
+
+
+@dataclass
+class Result:
+    target: Target
+    ready: bool
+    latency_ms: float
+    detail: str = None
+    attempts: int = 1
+    ready_ms: float = None  # --wait: time from start until the target became ready
+
+    def to_dict(self):
+        return {
+            "name": self.target.name,
+            "probe": self.target.probe,
+            "host": self.target.host,
+            "port": self.target.port,
+            "ready": self.ready,
+            "latency_ms": self.latency_ms,
+            "detail": self.detail,
+            "attempts": self.attempts,
+            "ready_ms": self.ready_ms,
+        }
+
+
+# -----------------------------
+# Probes
+# -----------------------------
+# Each probe is `async def probe(target) -> (ready, detail)`; it may raise
+# OSError or asyncio.TimeoutError, which run_probe turns into a failed result.
+async def probe_tcp(target):
+    """The port accepts TCP connections."""
+    _reader, writer = await asyncio.open_connection(target.host, target.port)
+    await close_writer(writer)
+    return True, "connected"
+
+
+async def probe_postgres(target):
+    """The server answers a protocol 3.0 startup message without 'cannot connect now'.
+
+    Same rule as pg_isready: an authentication request or any error other
+    than 57P03 (starting up / shutting down / in recovery) means Postgres is
+    accepting connections. No credentials are sent.
+    """
+    params = {"user": target.options.get("user", "postgres")}
+    if target.options.get("database"):
+        params["database"] = target.options["database"]
+    body = struct.pack("!i", 196608) + b"".join(
+        k.encode() + b"\0" + str(v).encode() + b"\0" for k, v in params.items()
+    ) + b"\0"
+    reader, writer = await asyncio.open_connection(target.host, target.port)
+    try:
+        writer.write(struct.pack("!i", len(body) + 4) + body)
+        await writer.drain()
+        kind = await reader.readexactly(1)
+        length = struct.unpack("!i", await reader.readexactly(4))[0]
+        payload = await reader.readexactly(min(length - 4, 4096))
+        if kind == b"R":
+            writer.write(b"X" + struct.pack("!i", 4))  # Terminate
+            return True, "accepting connections"
+        if kind == b"E":
+            fields = dict((f[:1].decode(), f[1:].decode(errors="replace"))
+                          for f in payload.split(b"\0") if f)
+            code, message = fields.get("C", ""), fields.get("M", "")
+            if code == "57P03":
+                return False, f"{code} {message}"
+            return True, f"accepting connections ({code} {message})"
+        return False, f"unexpected message {kind!r}"
+    except asyncio.IncompleteReadError:
+        return False, "connection closed during startup"
+    finally:
+        await close_writer(writer)
+
+
+async def probe_http(target):
+    """GET options["path"] answers with the expected status and, optionally, body text."""
+    path = target.options.get("path", "/")
+    expected_status = int(target.options.get("status", 200))
+    expected_body = target.options.get("body")
+    use_ssl = target.options.get("scheme") == "https"
+    reader, writer = await asyncio.open_connection(target.host, target.port, ssl=use_ssl or None)
+    try:
+        writer.write((f"GET {path} HTTP/1.1\r\nHost: {target.host}:{target.port}\r\n"
+                      f"User-Agent: port-check\r\nConnection: close\r\n\r\n").encode())
+        await writer.drain()
+        response = await reader.read(65536)
+        while len(response) < 65536:
+            chunk = await reader.read(65536 - len(response))
+            if not chunk:
+                break
+            response += chunk
+    finally:
+        await close_writer(writer)
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].decode(errors="replace")
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        return False, f"bad response {status_line!r}"
+    status = int(parts[1])
+    if status != expected_status:
+        return False, f"HTTP {status}, expected {expected_status}"
+    if expected_body and expected_body not in body.decode(errors="replace"):
+        return False, f"HTTP {status}, body missing {expected_body!r}"
+    return True, f"HTTP {status}"
+
+
+PROBES = {
+    "tcp": probe_tcp,
+    "postgres": probe_postgres,
+    "http": probe_http,
+}
+
+
+async def close_writer(writer):
+    writer.close()
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(1)
-            result = sock.connect_ex(('localhost', port))
-            if result == 0:
-                print(f"❌ WARNING: Port {port} ({service_name}) is already in use!")
-                return False
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+async def run_probe(target, default_timeout=1.0, probe=None):
+    """Run the target's probe (or `probe`) under its timeout; never raises."""
+    name = probe or target.probe
+    timeout = target.timeout or default_timeout
+    started = time.perf_counter()
+    try:
+        ready, detail = await asyncio.wait_for(PROBES[name](target), timeout)
+    except asyncio.TimeoutError:
+        ready, detail = False, f"timeout after {timeout:g}s"
+    except OSError as e:
+        ready, detail = False, e.strerror or str(e)
+    return Result(target, ready, round((time.perf_counter() - started) * 1000, 1), detail)
+
+
+async def scan(targets, timeout=1.0, concurrency=100, probe=None):
+    """Probe every target concurrently; results are in target order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(target):
+        async with semaphore:
+            return await run_probe(target, timeout, probe)
+
+    return await asyncio.gather(*(bounded(t) for t in targets))
+
+
+async def wait_until_ready(targets, deadline, timeout=1.0, concurrency=100,
+                           initial_delay=0.1, max_delay=2.0):
+    """Re-probe targets that are not ready with exponential backoff until all are ready or the deadline passes."""
+    started = time.monotonic()
+    results = {}
+    attempts = {id(t): 0 for t in targets}
+    pending = list(targets)
+    delay = initial_delay
+    while pending:
+        for result in await scan(pending, timeout, concurrency):
+            attempts[id(result.target)] += 1
+            result.attempts = attempts[id(result.target)]
+            if result.ready:
+                result.ready_ms = round((time.monotonic() - started) * 1000, 1)
+            results[id(result.target)] = result
+        pending = [t for t in pending if not results[id(t)].ready]
+        remaining = started + deadline - time.monotonic()
+        if not pending or remaining <= 0:
+            break
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+    return [results[id(t)] for t in targets]
+
+
+# -----------------------------
+# Targets
+# -----------------------------
+def parse_target(spec):
+    """host:port[=name] (TCP) or tcp://, postgres://user@host:port/db, http(s)://host:port/path[=name]."""
+    name = ""
+    if "=" in spec and "?" not in spec:
+        spec, _, name = spec.rpartition("=")
+    if "://" not in spec:
+        host, sep, port = spec.rpartition(":")
+        if not sep or not port.isdigit():
+            raise ValueError(f"invalid target {spec!r}, expected host:port or a URL")
+        return Target(name or f"{host}:{port}", host or "localhost", int(port))
+
+    url = urlsplit(spec)
+    scheme = {"postgresql": "postgres", "https": "http"}.get(url.scheme, url.scheme)
+    if scheme not in PROBES:
+        raise ValueError(f"unknown probe {url.scheme!r} in {spec!r}, expected one of {', '.join(PROBES)}")
+    default_port = {"postgres": 5432, "http": 443 if url.scheme == "https" else 80}.get(scheme)
+    port = url.port or default_port
+    if port is None:
+        raise ValueError(f"target {spec!r} needs a port")
+    options = {}
+    if scheme == "postgres":
+        options = {"user": url.username or "postgres", "database": url.path.lstrip("/") or None}
+    elif scheme == "http":
+        options = {"path": (url.path or "/") + (f"?{url.query}" if url.query else ""), "scheme": url.scheme}
+    return Target(name or f"{url.hostname}:{port}", url.hostname or "localhost", port, scheme, options=options)
+
+
+def target_from_dict(t):
+    """{"name", "host", "port", "probe", "timeout", plus probe options (path, status, body, user, database)}"""
+    if "url" in t:
+        target = parse_target(t["url"])
+    else:
+        target = Target("", t.get("host", "localhost"), int(t["port"]), t.get("probe", "tcp"))
+    if target.probe not in PROBES:
+        raise ValueError(f"unknown probe {target.probe!r}, expected one of {', '.join(PROBES)}")
+    target.name = t.get("name") or target.name or f"{target.host}:{target.port}"
+    target.timeout = t.get("timeout")
+    target.options.update({k: v for k, v in t.items()
+                           if k not in ("name", "host", "port", "probe", "timeout", "url")})
+    return target
+
+
+def load_structured(path):
+    with open(path) as f:
+        if path.endswith((".yml", ".yaml")):
+            if yaml is None:
+                raise RuntimeError(f"PyYAML is required to read {path} (pip install pyyaml)")
+            return yaml.safe_load(f) or {}
+        return json.load(f)
+
+
+def expand_env(value):
+    """Resolve ${VAR}, ${VAR:-default} and ${VAR-default} like docker compose."""
+    def repl(match):
+        name, op, default = match.group(1), match.group(2), match.group(3) or ""
+        current = os.environ.get(name)
+        if op == ":-" and not current:
+            return default
+        if op == "-" and current is None:
+            return default
+        return current or ""
+    return re.sub(r"\$\{(\w+)(?:(:?-)([^}]*))?\}", repl, str(value))
+
+
+def targets_from_config(path):
+    """{"targets": [{"name": ..., "host": ..., "port": ..., "probe": ...}, ...]}"""
+    return [target_from_dict(t) for t in load_structured(path).get("targets", [])]
+
+
+def postgres_target(name, host, port, env):
+    """Postgres images get the startup-handshake probe with their configured user/database."""
+    return Target(name, host, port, "postgres",
+                  options={"user": expand_env(env.get("POSTGRES_USER", "postgres")),
+                           "database": expand_env(env.get("POSTGRES_DB", "")) or None})
+
+
+def targets_from_compose(path, host="localhost"):
+    """Published ports of every service in a docker-compose file."""
+    targets = []
+    for service, spec in (load_structured(path).get("services") or {}).items():
+        for mapping in spec.get("ports") or []:
+            if isinstance(mapping, dict):
+                published, bind = mapping.get("published"), mapping.get("host_ip")
             else:
-                print(f"✅ Port {port} ({service_name}) is available")
-                return True
-    except Exception as e:
-        print(f"⚠️  Could not check port {port}: {e}")
-        return True
+                parts = expand_env(mapping).split("/")[0].split(":")
+                if len(parts) < 2:
+                    continue  # container port only: no fixed host port
+                published, bind = parts[-2], (parts[0] if len(parts) == 3 else None)
+            published = expand_env(published) if published is not None else ""
+            if not published.isdigit():
+                continue
+            bind = bind if bind not in (None, "", "0.0.0.0") else host
+            env = spec.get("environment") or {}
+            if str(spec.get("image", "")).startswith("postgres") and isinstance(env, dict):
+                targets.append(postgres_target(service, bind, int(published), env))
+            else:
+                targets.append(Target(service, bind, int(published)))
+    return targets
+
+
+def targets_from_helm_values(path):
+    """`<name>-service:<servicePort>` for each enabled component in a Helm values file."""
+    targets = []
+    for key, spec in (load_structured(path) or {}).items():
+        if not isinstance(spec, dict) or "servicePort" not in spec or spec.get("enabled") is False:
+            continue
+        name = spec.get("name", key)
+        host, port = f"{name}-service", int(spec["servicePort"])
+        if str(spec.get("image", "")).startswith("postgres"):
+            targets.append(postgres_target(name, host, port, {
+                "POSTGRES_USER": spec.get("username", "postgres"),
+                "POSTGRES_DB": spec.get("database", ""),
+            }))
+        else:
+            targets.append(Target(name, host, port))
+    return targets
+
+
+def collect_targets(args):
+    targets = [parse_target(spec) for spec in args.target]
+    if args.config:
+        targets += targets_from_config(args.config)
+    if args.compose:
+        targets += targets_from_compose(args.compose, args.host)
+    if args.helm_values:
+        targets += targets_from_helm_values(args.helm_values)
+    return targets
+
+
+# -----------------------------
+# Reporting
+# -----------------------------
+def check_port(port, service_name, host="localhost"):
+    """Check if a port is available"""
+    result = asyncio.run(run_probe(Target(service_name, host, port)))
+    report_free(result)
+    return not result.ready
+
+
+def report_free(result):
+    target = result.target
+    if result.ready:
+        print(f"❌ WARNING: Port {target.port} ({target.name}) is already in use!")
+    else:
+        print(f"✅ Port {target.port} ({target.name}) is available")
+
+
+def report_ready(result):
+    target = result.target
+    where = f"{target.probe}://{target.host}:{target.port}"
+    attempts = f", {result.attempts} attempts" if result.attempts > 1 else ""
+    if result.ready:
+        after = f", ready after {result.ready_ms} ms" if result.ready_ms is not None else ""
+        print(f"✅ {target.name} ({where}) {result.detail} [{result.latency_ms} ms{attempts}{after}]")
+    else:
+        print(f"❌ {target.name} ({where}) not ready: {result.detail} [{result.latency_ms} ms{attempts}]")
+
+
+def print_conflict_help(results):
+    print("\n🚨 PORT CONFLICTS DETECTED!")
+    print("Please update the following ports in 'devops/docker-compose.yml':")
+    print("\nCurrent configuration:")
+    for result in results:
+        print(f"  - {result.target.name}: {result.target.port}")
+    print("\n💡 How to fix:")
+    print("1. Stop the services using these ports, OR")
+    print("2. Modify the port mappings in devops/docker-compose.yml")
+    print("   Example: change '5454:5432' to '5455:5432'")
+
 
 def main():
-    print("🔍 Checking required ports...")
-    print("=" * 50)
-    
-    # Define ports to check
-    ports_to_check = [
-        (5454, "PostgreSQL Database"),
-        (5050, "Flask API Server"), 
-        (3030, "React Development Server")
-    ]
-    
-    all_available = True
-    
-    for port, service in ports_to_check:
-        if not check_port(port, service):
-            all_available = False
-    
-    print("=" * 50)
-    
-    if not all_available:
-        print("\n🚨 PORT CONFLICTS DETECTED!")
-        print("Please update the following ports in 'devops/docker-compose.yml':")
-        print("\nCurrent configuration:")
-        print("  - PostgreSQL: 5454")
-        print("  - Flask API: 5050") 
-        print("  - React: 3030")
-        print("\n💡 How to fix:")
-        print("1. Stop the services using these ports, OR")
-        print("2. Modify the port mappings in devops/docker-compose.yml")
-        print("   Example: change '5454:5432' to '5455:5432'")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Check that ports are free, or wait for services to be ready")
+    parser.add_argument("--target", action="append", default=[], metavar="TARGET",
+                        help="host:port[=NAME] or tcp://, postgres://user@host:port/db, http://host:port/path "
+                             "(repeatable)")
+    parser.add_argument("--config", help="JSON/YAML file with a 'targets' list")
+    parser.add_argument("--compose", help="docker-compose file: probe its published ports")
+    parser.add_argument("--helm-values", help="Helm values file: probe <name>-service:<servicePort>")
+    parser.add_argument("--host", default="localhost", help="host for compose published ports")
+    parser.add_argument("--expect", choices=("free", "ready"), default=None,
+                        help="'free' (default) checks ports are unused, 'ready' runs each target's probe once")
+    parser.add_argument("--wait", action="store_true", help="retry until every target is ready (implies --expect ready)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="--wait deadline in seconds")
+    parser.add_argument("--probe-timeout", "--connect-timeout", type=float, default=1.0,
+                        help="default per-probe timeout in seconds")
+    parser.add_argument("--max-delay", type=float, default=2.0, help="cap for the --wait backoff in seconds")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    expect = "ready" if args.wait else (args.expect or "free")
+    try:
+        targets = collect_targets(args)
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        parser.error(str(e))
+    if not targets:
+        targets = [Target(name, host, port) for name, host, port in DEFAULT_TARGETS]
+
+    if not args.json:
+        print("🔍 Checking required ports..." if expect == "free" else
+              f"🔍 Waiting for {len(targets)} target(s) (deadline {args.timeout:g}s)..." if args.wait else
+              f"🔍 Probing {len(targets)} target(s)...")
+        print("=" * 50)
+
+    started = time.perf_counter()
+    if args.wait:
+        results = asyncio.run(wait_until_ready(targets, args.timeout, args.probe_timeout,
+                                               args.concurrency, max_delay=args.max_delay))
+    elif expect == "free":
+        # A port is taken if anything accepts a connection, whatever protocol it speaks
+        results = asyncio.run(scan(targets, args.probe_timeout, args.concurrency, probe="tcp"))
     else:
+        results = asyncio.run(scan(targets, args.probe_timeout, args.concurrency))
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    ok = all((not r.ready) if expect == "free" else r.ready for r in results)
+
+    if args.json:
+        print(json.dumps({
+            "expect": expect,
+            "ok": ok,
+            "elapsed_ms": elapsed_ms,
+            "targets": [r.to_dict() for r in results],
+        }, indent=2))
+        if not ok:
+            sys.exit(1)
+        return True
+
+    for result in results:
+        (report_free if expect == "free" else report_ready)(result)
+    print("=" * 50)
+
+    if expect == "free":
+        if not ok:
+            print_conflict_help(results)
+            sys.exit(1)
         print("🎉 All ports are available! You can start the system.")
         return True
 
+    if not ok:
+        print(f"🚨 Not all targets are ready after {elapsed_ms / 1000:.1f}s")
+        sys.exit(1)
+    slowest = max(results, key=lambda r: r.ready_ms or r.latency_ms)
+    print(f"🎉 All targets ready in {elapsed_ms / 1000:.1f}s (slowest: {slowest.target.name})")
+    return True
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
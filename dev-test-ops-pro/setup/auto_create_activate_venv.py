@@ -1,11 +1,241 @@
 # create_venv.py (Level 2 - Enhanced)
+import argparse
+import hashlib
+import json
 import os
+import re
+import shutil
 import sys
 import subprocess
 import platform
+import time
 import webbrowser
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
 from pathlib import Path
 
+DEFAULT_CACHE_DIR = Path(os.getenv("VENV_CACHE_DIR", Path.home() / ".cache" / "dev-test-ops-venvs"))
+STAMP_FILE = ".provisioned.json"
+INCLUDE_RE = re.compile(r"^\s*(?:-r|--requirement|-c|--constraint)[=\s]+(\S+)")
+
+
+# ===========================================
+# Cached, hash-keyed provisioning
+# ===========================================
+def requirements_key(requirements):
+    """sha256 of the requirements (plus any -r/-c files they pull in) and this Python build."""
+    digest = hashlib.sha256()
+    digest.update(f"{sys.version}|{platform.system()}|{platform.machine()}".encode())
+    seen, queue = set(), [Path(requirements).resolve()]
+    while queue:
+        path = queue.pop(0)
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        content = path.read_bytes()
+        digest.update(path.name.encode() + b"\0" + content + b"\0")
+        for line in content.decode(errors="replace").splitlines():
+            match = INCLUDE_RE.match(line)
+            if match:
+                queue.append(path.parent / match.group(1))
+    return digest.hexdigest()[:16]
+
+
+def venv_bin(venv_path):
+    return Path(venv_path) / ("Scripts" if platform.system().lower() == "windows" else "bin")
+
+
+def venv_python(venv_path):
+    return venv_bin(venv_path) / ("python.exe" if platform.system().lower() == "windows" else "python")
+
+
+def read_stamp(venv_path):
+    try:
+        return json.loads((Path(venv_path) / STAMP_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def write_stamp(venv_path, key, requirements):
+    (Path(venv_path) / STAMP_FILE).write_text(json.dumps({
+        "key": key,
+        "requirements": str(requirements),
+        "python": sys.version.split()[0],
+        "provisioned_at": datetime.utcnow().isoformat(),
+    }, indent=2))
+
+
+def run_pip(python, *args, **kwargs):
+    subprocess.run([str(python), "-m", "pip", "--disable-pip-version-check", "--no-input", *args],
+                   check=True, stdout=subprocess.DEVNULL, **kwargs)
+
+
+def install_from_wheel_cache(python, requirements, wheel_dir):
+    """Install offline from the wheel cache; build/download missing wheels into it first if needed."""
+    offline = ["install", "--no-index", "--find-links", str(wheel_dir), "-r", str(requirements)]
+    try:
+        run_pip(python, *offline, stderr=subprocess.DEVNULL)  # fails fast when a wheel is missing
+        return "wheel cache"
+    except subprocess.CalledProcessError:
+        pass
+    wheel_dir.mkdir(parents=True, exist_ok=True)
+    # Build into a private directory and move wheels in atomically, so parallel
+    # provisioning runs sharing the cache never see a half-written wheel
+    staging = wheel_dir / f".staging-{os.getpid()}"
+    try:
+        run_pip(python, "wheel", "--find-links", str(wheel_dir), "-w", str(staging), "-r", str(requirements))
+        for wheel in staging.iterdir():
+            os.replace(wheel, wheel_dir / wheel.name)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    run_pip(python, *offline)
+    return "downloaded"
+
+
+def relocate_venv(venv_path, old_path, new_path):
+    """Rewrite old_path to new_path in a copied venv (activate scripts, console-script shebangs, pyvenv.cfg)."""
+    old, new = str(Path(old_path).absolute()).encode(), str(Path(new_path).absolute()).encode()
+    files = [p for p in venv_bin(venv_path).iterdir() if p.is_file() and not p.is_symlink()]
+    files.append(Path(venv_path) / "pyvenv.cfg")
+    for path in files:
+        content = path.read_bytes()
+        if old in content and b"\0" not in content:  # text files only; leave binaries alone
+            path.write_bytes(content.replace(old, new))
+
+
+def copy_venv(src, dst):
+    """Copy a venv to dst (via a temporary sibling, so dst is never half-written) and relocate it."""
+    dst = Path(dst)
+    tmp = dst.with_name(f".{dst.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    shutil.copytree(src, tmp, symlinks=True)
+    relocate_venv(tmp, src, dst)
+    shutil.rmtree(dst, ignore_errors=True)
+    os.replace(tmp, dst)
+
+
+def provision_environment(project_dir, venv_name=".venv", requirements="requirements.txt",
+                          cache_dir=DEFAULT_CACHE_DIR, force=False, use_template=True):
+    """Create or reuse `project_dir/venv_name` for `requirements`, without prompting.
+
+    Skips all work when the venv's stamp matches the requirements key; otherwise
+    clones the cached template venv for that key, or builds a fresh venv from
+    the shared wheel cache and saves it as the template for next time.
+    Returns a summary dict with the action taken and the time it took.
+    """
+    started = time.perf_counter()
+    project_dir = Path(project_dir).absolute()
+    requirements = project_dir / requirements
+    venv_path = project_dir / venv_name
+    cache_dir = Path(cache_dir)
+    if not requirements.exists():
+        raise FileNotFoundError(f"{requirements} not found")
+
+    key = requirements_key(requirements)
+    summary = {"project": str(project_dir), "venv": str(venv_path), "key": key}
+    # Windows console-script launchers embed their venv path in binary .exe files
+    use_template = use_template and platform.system().lower() != "windows"
+    template = cache_dir / "templates" / key
+
+    if not force and read_stamp(venv_path).get("key") == key and venv_python(venv_path).exists():
+        action = "up to date"
+    elif use_template and not force and read_stamp(template).get("key") == key:
+        copy_venv(template, venv_path)
+        write_stamp(venv_path, key, requirements)
+        action = "cloned template"
+    else:
+        shutil.rmtree(venv_path, ignore_errors=True)
+        subprocess.run([sys.executable, "-m", "venv", str(venv_path)], check=True)
+        source = install_from_wheel_cache(venv_python(venv_path), requirements, cache_dir / "wheels")
+        write_stamp(venv_path, key, requirements)
+        if use_template:
+            template.parent.mkdir(parents=True, exist_ok=True)
+            copy_venv(venv_path, template)
+        action = f"built ({source})"
+
+    summary.update(action=action, seconds=round(time.perf_counter() - started, 2))
+    return summary
+
+
+# ===========================================
+# Batch provisioning of every project in the tree
+# ===========================================
+SKIP_DIRS = {"node_modules", "__pycache__", "site-packages", "venv", "env"}
+
+
+def discover_projects(root, requirements="requirements.txt"):
+    """Directories under root holding a requirements file, skipping node_modules, venvs and hidden dirs."""
+    projects = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in SKIP_DIRS and not d.startswith(".")
+            and not os.path.exists(os.path.join(dirpath, d, "pyvenv.cfg"))
+        )
+        if requirements in filenames:
+            projects.append(Path(dirpath))
+    return projects
+
+
+def _provision_one(project_dir, venv_name, requirements, cache_dir, force, use_template):
+    """Process-pool worker: never raises, so one broken project doesn't stop the batch."""
+    started = time.perf_counter()
+    try:
+        return provision_environment(project_dir, venv_name, requirements, cache_dir, force, use_template)
+    except (OSError, subprocess.CalledProcessError) as e:
+        return {"project": str(Path(project_dir).absolute()), "action": "failed", "error": str(e),
+                "seconds": round(time.perf_counter() - started, 2)}
+
+
+def provision_all(projects, venv_name=".venv", requirements="requirements.txt", cache_dir=DEFAULT_CACHE_DIR,
+                  jobs=None, force=False, use_template=True):
+    """Provision every project with at most `jobs` builds at once; returns summaries in project order.
+
+    Projects with identical requirements share a key: the first one builds the
+    template and the rest wait for it, then clone it instead of building too.
+    """
+    jobs = jobs or min(4, os.cpu_count() or 1)
+    followers = {}
+    leaders = []
+    for project in projects:
+        key = requirements_key(Path(project) / requirements)
+        if key in followers:
+            followers[key].append(project)
+        else:
+            followers[key] = []
+            leaders.append((key, project))
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = {pool.submit(_provision_one, project, venv_name, requirements, cache_dir, force,
+                               use_template): key
+                   for key, project in leaders}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                summary = future.result()
+                results[summary["project"]] = summary
+                print(f"  {'❌' if summary['action'] == 'failed' else '✅'} {summary['project']}: "
+                      f"{summary['action']} ({summary['seconds']}s)")
+                # The template is fresh now, so even with --force the followers can clone it
+                for project in followers.pop(key, []):
+                    pending[pool.submit(_provision_one, project, venv_name, requirements, cache_dir,
+                                        force and not use_template, use_template)] = None
+    return [results[str(Path(p).absolute())] for p in projects]
+
+
+def print_timing_summary(summaries, root, wall):
+    print(f"\n⏱️  **Provisioning Summary:**")
+    for summary in summaries:
+        project = os.path.relpath(summary["project"], root)
+        print(f"  {project:<45} {summary['action']:<22} {summary['seconds']:>7.2f}s")
+        if summary.get("error"):
+            print(f"      ❌ {summary['error']}")
+    total = sum(s["seconds"] for s in summaries)
+    print(f"  {len(summaries)} project(s): {wall:.2f}s wall, {total:.2f}s of work")
+
+
 class VenvCreator:
     def __init__(self):
         self.system = platform.system().lower()
@@ -44,6 +274,23 @@ class VenvCreator:
         
         return True
     
+    def provision(self, project_dir=".", venv_name=".venv", requirements="requirements.txt",
+                  cache_dir=DEFAULT_CACHE_DIR, force=False, use_template=True):
+        """
+        Non-interactive: cached, hash-keyed environment for an existing requirements.txt
+        """
+        self.venv_name = str(Path(project_dir) / venv_name)
+        print(f"🚀 Provisioning {self.venv_name} from {requirements}")
+        try:
+            summary = provision_environment(project_dir, venv_name, requirements, cache_dir,
+                                            force, use_template)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"❌ Error provisioning virtual environment: {e}")
+            return None
+        print(f"✅ {summary['action']} in {summary['seconds']}s (key {summary['key']})")
+        self.show_activation_commands()
+        return summary
+
     def create_requirements_file(self):
         """Create a basic requirements.txt file"""
         requirements_content = "# Add your project dependencies here\n# Example:\n# flask==2.3.3\n# requests==2.31.0\n"
@@ -122,10 +369,41 @@ exec $SHELL
             print(f"⚠️  Could not create activation script: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Create a virtual environment (interactive) or provision one from requirements.txt")
+    parser.add_argument("--provision", metavar="PROJECT_DIR", help="non-interactive: provision PROJECT_DIR/<venv> from its requirements")
+    parser.add_argument("--all", nargs="?", const=str(Path(__file__).resolve().parent.parent), metavar="ROOT",
+                        help="non-interactive: provision every project with a requirements file under ROOT "
+                             "(default: the repo)")
+    parser.add_argument("--jobs", type=int, default=None, help="parallel builds for --all (default: min(4, CPUs))")
+    parser.add_argument("--venv", default=".venv", help="venv directory inside the project (default: .venv)")
+    parser.add_argument("--requirements", default="requirements.txt", help="requirements file inside the project")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="shared wheel cache and template venvs")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the stamp matches")
+    parser.add_argument("--no-template", action="store_true", help="don't clone or save template venvs")
+    args = parser.parse_args()
+
     print("🐍 Python Virtual Environment Creator - Level 2")
     print("=" * 50)
     
     creator = VenvCreator()
+
+    if args.all:
+        projects = discover_projects(args.all, args.requirements)
+        print(f"🔍 Found {len(projects)} project(s) under {args.all}")
+        started = time.perf_counter()
+        summaries = provision_all(projects, args.venv, args.requirements, args.cache_dir, args.jobs,
+                                  args.force, not args.no_template)
+        print_timing_summary(summaries, args.all, time.perf_counter() - started)
+        if any(s["action"] == "failed" for s in summaries):
+            sys.exit(1)
+        return
+
+    if args.provision:
+        summary = creator.provision(args.provision, args.venv, args.requirements, args.cache_dir,
+                                    args.force, not args.no_template)
+        if summary is None:
+            sys.exit(1)
+        return
     
     # Get virtual environment name from user
     venv_name = input("Enter the name for your virtual environment: ").strip()
@@ -1,16 +1,25 @@
 # create_venv.py (Level 2 - Auto Activate in new shell)
+import argparse
 import os
 import sys
 import subprocess
 import platform
 
-def create_virtual_environment(venv_name):
+from auto_create_activate_venv import DEFAULT_CACHE_DIR, provision_environment
+
+def create_virtual_environment(venv_name, requirements=None, activate=True):
     print(f"🚀 Creating virtual environment: {venv_name}")
     try:
-        subprocess.run([sys.executable, "-m", "venv", venv_name], check=True)
-        print(f"✅ Virtual environment '{venv_name}' created successfully!")
-        activate_virtual_environment(venv_name)
-    except subprocess.CalledProcessError as e:
+        if requirements:
+            # Cached, hash-keyed build: no-op when requirements.txt and Python are unchanged
+            summary = provision_environment(os.getcwd(), venv_name, requirements, DEFAULT_CACHE_DIR)
+            print(f"✅ Virtual environment '{venv_name}' {summary['action']} in {summary['seconds']}s")
+        else:
+            subprocess.run([sys.executable, "-m", "venv", venv_name], check=True)
+            print(f"✅ Virtual environment '{venv_name}' created successfully!")
+        if activate:
+            activate_virtual_environment(venv_name)
+    except (OSError, subprocess.CalledProcessError) as e:
         print(f"❌ Error creating virtual environment: {e}")
         return False
     return True
@@ -27,13 +36,20 @@ def activate_virtual_environment(venv_name):
         subprocess.run(["bash", "--rcfile", activate_script])  # opens new bash
 
 def main():
+    parser = argparse.ArgumentParser(description="Create a virtual environment and open a shell in it")
+    parser.add_argument("venv_name", nargs="?", help="asked interactively when omitted")
+    parser.add_argument("-r", "--requirements", help="install this requirements file (cached by content hash)")
+    parser.add_argument("--no-shell", action="store_true", help="don't open an activated shell afterwards")
+    args = parser.parse_args()
+
     print("🐍 Python Virtual Environment Creator + Activator")
     print("=" * 50)
-    venv_name = input("Enter the name for your virtual environment: ").strip()
+    venv_name = args.venv_name or input("Enter the name for your virtual environment: ").strip()
     if not venv_name:
         print("❌ Virtual environment name cannot be empty!")
         return
-    create_virtual_environment(venv_name)
+    if not create_virtual_environment(venv_name, args.requirements, not args.no_shell):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
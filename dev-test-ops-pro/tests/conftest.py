@@ -0,0 +1,24 @@
+"""Load the repo's stand-alone scripts as modules (port-check.py has a dash in its name)."""
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(name, path):
+    spec = importlib.util.spec_from_file_location(name, ROOT / path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def port_check():
+    return load_script("port_check", "port-check.py")
+
+
+@pytest.fixture(scope="session")
+def venv_setup():
+    return load_script("auto_create_activate_venv", "setup/auto_create_activate_venv.py")
@@ -0,0 +1,66 @@
+import pytest
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("localhost:5050", ("localhost:5050", "localhost", 5050, "tcp", {})),
+    (":3030=react", ("react", "localhost", 3030, "tcp", {})),
+    ("tcp://db:5432", ("db:5432", "db", 5432, "tcp", {})),
+    ("postgres://appuser@localhost:5454/appdb",
+     ("localhost:5454", "localhost", 5454, "postgres", {"user": "appuser", "database": "appdb"})),
+    ("postgresql://pg/", ("pg:5432", "pg", 5432, "postgres", {"user": "postgres", "database": None})),
+    ("http://localhost:5050/health=api",
+     ("api", "localhost", 5050, "http", {"path": "/health", "scheme": "http"})),
+    ("https://example.test/ready?full=1",
+     ("example.test:443", "example.test", 443, "http", {"path": "/ready?full=1", "scheme": "https"})),
+])
+def test_parse_target(port_check, spec, expected):
+    t = port_check.parse_target(spec)
+    assert (t.name, t.host, t.port, t.probe, t.options) == expected
+
+
+@pytest.mark.parametrize("spec", ["localhost", "localhost:http", "ftp://host:21", "tcp://host"])
+def test_parse_target_rejects(port_check, spec):
+    with pytest.raises(ValueError):
+        port_check.parse_target(spec)
+
+
+def test_targets_from_compose(port_check, tmp_path, monkeypatch):
+    monkeypatch.setenv("API_PORT", "5051")
+    monkeypatch.delenv("UI_PORT", raising=False)
+    compose = tmp_path / "docker-compose.yml"
+    compose.write_text("""
+services:
+  postgres:
+    image: postgres:15
+    environment:
+      POSTGRES_USER: appuser
+      POSTGRES_DB: appdb
+    ports:
+      - "5454:5432"
+  api:
+    image: flask-api
+    ports:
+      - "127.0.0.1:${API_PORT:-5050}:5050/tcp"
+      - "9000"
+  ui:
+    image: react
+    ports:
+      - target: 3000
+        published: "${UI_PORT:-3030}"
+  worker:
+    image: worker
+""")
+    targets = port_check.targets_from_compose(str(compose))
+    summary = [(t.name, t.host, t.port, t.probe, t.options) for t in targets]
+    assert summary == [
+        ("postgres", "localhost", 5454, "postgres", {"user": "appuser", "database": "appdb"}),
+        ("api", "127.0.0.1", 5051, "tcp", {}),
+        ("ui", "localhost", 3030, "tcp", {}),
+    ]
+
+
+def test_expand_env(port_check, monkeypatch):
+    monkeypatch.setenv("SET", "x")
+    monkeypatch.setenv("EMPTY", "")
+    monkeypatch.delenv("UNSET", raising=False)
+    assert port_check.expand_env("${SET:-d}/${EMPTY:-d}/${EMPTY-d}/${UNSET-d}/${UNSET}") == "x/d//d/"
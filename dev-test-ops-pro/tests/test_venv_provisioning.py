@@ -0,0 +1,41 @@
+def test_requirements_key_is_stable(venv_setup, tmp_path):
+    req = tmp_path / "requirements.txt"
+    req.write_text("flask==3.0.3\n")
+    assert venv_setup.requirements_key(req) == venv_setup.requirements_key(req)
+    assert len(venv_setup.requirements_key(req)) == 16
+
+
+def test_requirements_key_changes_with_content(venv_setup, tmp_path):
+    req = tmp_path / "requirements.txt"
+    req.write_text("flask==3.0.3\n")
+    before = venv_setup.requirements_key(req)
+    req.write_text("flask==3.0.4\n")
+    assert venv_setup.requirements_key(req) != before
+
+
+def test_requirements_key_follows_includes(venv_setup, tmp_path):
+    (tmp_path / "base.txt").write_text("requests==2.32.3\n")
+    (tmp_path / "constraints.txt").write_text("urllib3<3\n")
+    req = tmp_path / "requirements.txt"
+    req.write_text("-r base.txt\n--constraint=constraints.txt\nflask==3.0.3\n")
+    before = venv_setup.requirements_key(req)
+
+    (tmp_path / "base.txt").write_text("requests==2.32.4\n")
+    after_base = venv_setup.requirements_key(req)
+    (tmp_path / "constraints.txt").write_text("urllib3<2\n")
+    assert len({before, after_base, venv_setup.requirements_key(req)}) == 3
+
+
+def test_requirements_key_tolerates_include_cycles_and_missing_files(venv_setup, tmp_path):
+    (tmp_path / "a.txt").write_text("-r b.txt\n-r missing.txt\n")
+    (tmp_path / "b.txt").write_text("-r a.txt\n")
+    assert venv_setup.requirements_key(tmp_path / "a.txt")
+
+
+def test_requirements_key_ignores_unchanged_location(venv_setup, tmp_path):
+    # Same files in two project directories share one cached environment
+    for project in ("one", "two"):
+        (tmp_path / project).mkdir()
+        (tmp_path / project / "requirements.txt").write_text("flask==3.0.3\n")
+    assert (venv_setup.requirements_key(tmp_path / "one" / "requirements.txt")
+            == venv_setup.requirements_key(tmp_path / "two" / "requirements.txt"))